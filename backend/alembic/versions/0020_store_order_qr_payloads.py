@@ -0,0 +1,35 @@
+"""Store order QR payloads instead of base64 PNG images
+
+Revision ID: 0020_store_order_qr_payloads
+Revises: 0019_update_rental_contracts_for_auto_payments
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0020'
+down_revision: Union[str, None] = '0019'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Replace stored data: URIs with the compact payload the image was built from
+    op.execute("UPDATE orders SET qr_code = 'ORDER:' || id WHERE qr_code IS NOT NULL")
+    op.alter_column('orders', 'qr_code',
+                    existing_type=sa.String(2000),
+                    type_=sa.String(500),
+                    existing_nullable=True)
+
+
+def downgrade() -> None:
+    # Payloads stay as they are - images are rendered by GET /bookings/{id}/qr.png
+    op.alter_column('orders', 'qr_code',
+                    existing_type=sa.String(500),
+                    type_=sa.String(2000),
+                    existing_nullable=True)
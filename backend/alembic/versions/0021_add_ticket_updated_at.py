@@ -0,0 +1,31 @@
+"""Add updated_at to tickets for the gate manifest
+
+Revision ID: 0021_add_ticket_updated_at
+Revises: 0020_store_order_qr_payloads
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0021'
+down_revision: Union[str, None] = '0020'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tickets', sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True))
+    # Existing tickets were last changed no earlier than they were bought
+    op.execute("UPDATE tickets SET updated_at = purchase_date")
+    op.alter_column('tickets', 'updated_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('idx_ticket_updated_at', 'tickets', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_ticket_updated_at', table_name='tickets')
+    op.drop_column('tickets', 'updated_at')
@@ -0,0 +1,37 @@
+"""Use Moscow time for the server default of tickets.updated_at
+
+Revision ID: 0022_ticket_updated_at_moscow_default
+Revises: 0021_add_ticket_updated_at
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0022'
+down_revision: Union[str, None] = '0021'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Приложение пишет наивное московское время; now() зависел бы от часового пояса сессии БД
+    op.alter_column(
+        'tickets', 'updated_at',
+        existing_type=sa.DateTime(),
+        existing_nullable=False,
+        server_default=sa.text("(now() AT TIME ZONE 'Europe/Moscow')")
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'tickets', 'updated_at',
+        existing_type=sa.DateTime(),
+        existing_nullable=False,
+        server_default=sa.func.now()
+    )
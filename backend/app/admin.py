@@ -25,7 +25,7 @@ from app.models.user import User
 # ... другие импорты моделей ...
 
 # Импортируем engine из вашего файла базы данных
-from app.database import engine
+from app.database import interactive_engine
 from app.config import get_settings
 from app.models.user import User
 from app.models.film import Film
@@ -49,7 +49,7 @@ from app.models.concession_preorder import ConcessionPreorder
 from app.models.enums import UserStatus, PaymentStatus, OrderStatus, TicketStatus, PreorderStatus, ConcessionItemStatus
 
 
-from app.database import engine # <-- Добавлен импорт engine
+from app.database import interactive_engine # <-- Добавлен импорт engine
 
 
 class AdminAuthBackend(AuthenticationBackend):
@@ -59,10 +59,10 @@ class AdminAuthBackend(AuthenticationBackend):
 
         # from app.database import get_db # <-- Не нужно импортировать get_db
         # from app.models.user import User # <-- Уже импортирован выше
-        from app.utils.security import verify_password
+        from app.utils.security import verify_password_async
 
         # Get database session - Создаем сессию напрямую через engine
-        async with AsyncSession(engine) as db:
+        async with AsyncSession(interactive_engine) as db:
             # Find user by email
             # ИСПРАВЛЕНО: Добавляем options(selectinload(...)) для предзагрузки роли
             result = await db.execute(
@@ -72,7 +72,7 @@ class AdminAuthBackend(AuthenticationBackend):
             )
             user = result.scalar_one_or_none()
 
-            if user and verify_password(password, user.password_hash):
+            if user and await verify_password_async(password, user.password_hash):
                 # Check if user is admin
                 # Теперь user.role должен быть загружен, и ошибка MissingGreenlet не возникнет
                 if user.role and user.role.name in ["admin", "super_admin", "staff"]:
@@ -96,7 +96,7 @@ class AdminAuthBackend(AuthenticationBackend):
         # from app.models.user import User # <-- Уже импортирован выше
 
         # Get database session - Создаем сессию напрямую через engine
-        async with AsyncSession(engine) as db:
+        async with AsyncSession(interactive_engine) as db:
             # Find user by ID
             # ИСПРАВЛЕНО: Добавляем options(selectinload(...)) для предзагрузки роли
             result = await db.execute(
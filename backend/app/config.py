@@ -1,7 +1,7 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import BeforeValidator
 from functools import lru_cache
-from typing import List, Union, Annotated
+from typing import List, Optional, Union, Annotated
 
 
 def parse_cors_origins(v: Union[str, List[str]]) -> List[str]:
@@ -23,11 +23,44 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     DB_ECHO: bool = False
 
+    # Connection pools per workload class (statement timeout in ms, 0 - no limit)
+    # critical: bookings, payments, QR scans and other writes
+    DB_CRITICAL_POOL_SIZE: int = 10
+    DB_CRITICAL_MAX_OVERFLOW: int = 10
+    DB_CRITICAL_POOL_TIMEOUT_SECONDS: float = 5.0
+    DB_CRITICAL_STATEMENT_TIMEOUT_MS: int = 5000
+    # interactive: catalog, seat maps, order history, admin panel
+    DB_INTERACTIVE_POOL_SIZE: int = 10
+    DB_INTERACTIVE_MAX_OVERFLOW: int = 10
+    DB_INTERACTIVE_POOL_TIMEOUT_SECONDS: float = 10.0
+    DB_INTERACTIVE_STATEMENT_TIMEOUT_MS: int = 10000
+    # batch: dashboard, reports, contract payouts, background jobs
+    DB_BATCH_POOL_SIZE: int = 5
+    DB_BATCH_MAX_OVERFLOW: int = 0
+    DB_BATCH_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_BATCH_STATEMENT_TIMEOUT_MS: int = 120000
+
+    # Read replica (optional) for catalog, order history, dashboard and reporting reads
+    DATABASE_REPLICA_URL: Optional[str] = None
+    REPLICA_POOL_SIZE: int = 10
+    REPLICA_MAX_OVERFLOW: int = 20
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 2.0
+    READ_YOUR_WRITES_SECONDS: float = 15.0
+    READ_YOUR_WRITES_MAX_USERS: int = 10000
+
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Principal cache
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    VERIFIED_TOKEN_CACHE_MAX_SIZE: int = 10000
 
     # CORS - используем Union чтобы избежать автоматического JSON парсинга
     CORS_ORIGINS: Annotated[
@@ -35,6 +68,55 @@ class Settings(BaseSettings):
         BeforeValidator(parse_cors_origins)
     ] = "http://localhost:3000,http://localhost:5173"
 
+    # HTTP request logging
+    HTTP_LOG_FILE: str = "http_requests.log"
+    HTTP_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    HTTP_LOG_BACKUP_COUNT: int = 5
+    HTTP_LOG_CAPTURE_BODY: bool = True
+    HTTP_LOG_BODY_MAX_BYTES: int = 2048
+    HTTP_LOG_BODY_EXCLUDE_PATHS: str = "/api/v1/auth/login,/api/v1/auth/register,/api/v1/payments,/api/v1/users"
+    HTTP_LOG_SAMPLE_RATE: float = 1.0
+    HTTP_LOG_LOAD_QUEUE_THRESHOLD: int = 1000
+    HTTP_LOG_LOAD_SAMPLE_RATE: float = 0.1
+    HTTP_LOG_QUEUE_MAX_SIZE: int = 10000
+
+    # Metrics
+    METRICS_ENABLED: bool = True
+    # Only direct connections count: behind a reverse proxy on the same host every request
+    # comes from 127.0.0.1, so requests with X-Forwarded-For / X-Real-IP / Forwarded are
+    # rejected. Scrape through a proxy with METRICS_TOKEN ("Authorization: Bearer <token>")
+    METRICS_ALLOWED_HOSTS: str = "127.0.0.1,::1"
+    METRICS_TOKEN: Optional[str] = None
+    SERVER_TIMING_ENABLED: bool = True
+    DB_QUERY_DEBUG_HEADERS: bool = False
+    DB_REPEATED_QUERY_THRESHOLD: int = 10
+
+    # Slow query log
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    SLOW_QUERY_LOG_FILE: str = "slow_queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
+    SLOW_QUERY_RECENT_LIMIT: int = 200
+    SLOW_QUERY_LOG_QUEUE_MAX_SIZE: int = 1000
+    SLOW_QUERY_EXPLAIN_ENABLED: bool = True
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 1.0
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: int = 300
+    SLOW_QUERY_EXPLAIN_MAX_PENDING: int = 4
+
+    # Event loop monitor
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_MS: int = 100
+    LOOP_MONITOR_WINDOW: int = 600
+    LOOP_BLOCK_THRESHOLD_MS: int = 200
+    LOOP_BLOCK_REPORTS_LIMIT: int = 50
+
+    # On-demand request profiling (super admins only: "X-Profile: 1" header or "_profile=1" query)
+    PROFILING_ENABLED: bool = True
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILES_DIR: str = "profiles"
+    PROFILES_MAX_FILES: int = 100
+
     # Bonus System
     BONUS_ACCRUAL_PERCENTAGE: int = 10
     BONUS_POINTS_PER_RUBLE: int = 1
@@ -42,6 +124,20 @@ class Settings(BaseSettings):
     BONUS_MAX_PERCENTAGE: int = 99
     BONUS_MIN_PAYMENT_AMOUNT: int = 11
 
+    # Promocode cache
+    PROMOCODE_CACHE_TTL_SECONDS: int = 60
+
+    # Concession menu cache
+    CONCESSION_MENU_CACHE_TTL_SECONDS: int = 300
+    CONCESSION_MENU_MAX_AGE_SECONDS: int = 30
+    CONCESSION_MENU_RENDERED_PAGES: int = 32
+    CONCESSION_LOW_STOCK_THRESHOLD: int = 10
+
+    # Concession prep queue
+    PREP_QUEUE_MAX_WINDOW_MINUTES: int = 240
+    PREP_QUEUE_REFRESH_SECONDS: int = 15
+    PREP_QUEUE_DEBOUNCE_SECONDS: float = 1.0
+
     # Reservation
     SEAT_RESERVATION_TIMEOUT_MINUTES: int = 5
 
@@ -51,6 +147,17 @@ class Settings(BaseSettings):
     # QR Code
     QR_CODE_SIZE: int = 10
     QR_CODE_BORDER: int = 4
+    QR_RENDER_WORKERS: int = 2
+    QR_IMAGE_CACHE_MAX_SIZE: int = 2000
+    QR_IMAGE_MAX_AGE_SECONDS: int = 31536000
+    QR_TOKEN_SECRET: Optional[str] = None  # по умолчанию ключ выводится из SECRET_KEY
+    QR_TOKEN_ENTRY_OPENS_MINUTES: int = 60
+
+    # Gate manifest (offline ticket validation)
+    GATE_MANIFEST_WINDOW_HOURS: int = 4
+    GATE_MANIFEST_MAX_WINDOW_HOURS: int = 24
+    GATE_MANIFEST_VERSION_OVERLAP_SECONDS: int = 30
+    GATE_SYNC_MAX_CHECK_INS: int = 1000
 
     # File Upload
     UPLOAD_DIR: str = "uploads"
@@ -1,28 +1,118 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict
 
 from app.config import settings
+from app.services.replica_router import replica_router
+from app.utils.auth_context import get_request_claims
+from app.utils.read_your_writes import read_primary_until
 
-# Create async engine
-engine = create_async_engine(
+# Workload classes: each has its own pool, so a slow report or a burst of admin reads
+# can never take the connections of ticket sales and gate scans
+WORKLOAD_CRITICAL = "critical"        # bookings, payments, QR scans and every other write
+WORKLOAD_INTERACTIVE = "interactive"  # catalog, seat maps, order history, admin panel
+WORKLOAD_BATCH = "batch"              # dashboard, reports, contract payouts, background jobs
+
+
+def _create_engine(url: str, pool_size: int, max_overflow: int, pool_timeout: float,
+                   statement_timeout_ms: int) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        future=True,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        # statement_timeout задаётся для всех соединений пула при подключении (0 - без ограничения)
+        connect_args={"server_settings": {"statement_timeout": str(statement_timeout_ms)}},
+    )
+
+
+def _sessionmaker(engine: AsyncEngine, read_only: bool = False) -> async_sessionmaker:
+    # READ ONLY: asyncpg открывает транзакции с этим флагом, при возврате в пул он сбрасывается
+    return async_sessionmaker(
+        engine.execution_options(postgresql_readonly=True) if read_only else engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+# Critical workload - the main engine
+engine = _create_engine(
+    settings.DATABASE_URL,
+    settings.DB_CRITICAL_POOL_SIZE,
+    settings.DB_CRITICAL_MAX_OVERFLOW,
+    settings.DB_CRITICAL_POOL_TIMEOUT_SECONDS,
+    settings.DB_CRITICAL_STATEMENT_TIMEOUT_MS,
+)
+
+interactive_engine = _create_engine(
     settings.DATABASE_URL,
-    echo=settings.DB_ECHO,
-    future=True,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    settings.DB_INTERACTIVE_POOL_SIZE,
+    settings.DB_INTERACTIVE_MAX_OVERFLOW,
+    settings.DB_INTERACTIVE_POOL_TIMEOUT_SECONDS,
+    settings.DB_INTERACTIVE_STATEMENT_TIMEOUT_MS,
 )
 
-# Create async session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
+batch_engine = _create_engine(
+    settings.DATABASE_URL,
+    settings.DB_BATCH_POOL_SIZE,
+    settings.DB_BATCH_MAX_OVERFLOW,
+    settings.DB_BATCH_POOL_TIMEOUT_SECONDS,
+    settings.DB_BATCH_STATEMENT_TIMEOUT_MS,
 )
 
+workload_engines: Dict[str, AsyncEngine] = {
+    WORKLOAD_CRITICAL: engine,
+    WORKLOAD_INTERACTIVE: interactive_engine,
+    WORKLOAD_BATCH: batch_engine,
+}
+
+# Create async session factories
+AsyncSessionLocal = _sessionmaker(engine)
+ReadOnlySessionLocal = _sessionmaker(interactive_engine, read_only=True)
+BatchSessionLocal = _sessionmaker(batch_engine)
+BatchReadOnlySessionLocal = _sessionmaker(batch_engine, read_only=True)
+
+# Optional read replica (see services/replica_router.py for routing and the lag guard)
+replica_engine = _create_engine(
+    settings.DATABASE_REPLICA_URL,
+    settings.REPLICA_POOL_SIZE,
+    settings.REPLICA_MAX_OVERFLOW,
+    settings.DB_INTERACTIVE_POOL_TIMEOUT_SECONDS,
+    settings.DB_BATCH_STATEMENT_TIMEOUT_MS,
+) if settings.DATABASE_REPLICA_URL else None
+
+ReplicaSessionLocal = _sessionmaker(replica_engine, read_only=True) if replica_engine is not None else None
+
+
+def pool_status() -> Dict[str, dict]:
+    """Checked-out and idle connections of every pool of this worker."""
+    engines = dict(workload_engines)
+    if replica_engine is not None:
+        engines["replica"] = replica_engine
+    return {
+        name: {
+            "size": workload_engine.pool.size(),
+            "checked_out": workload_engine.pool.checkedout(),
+            "idle": workload_engine.pool.checkedin(),
+            "overflow": max(workload_engine.pool.overflow(), 0),
+            "timeout_seconds": workload_engine.pool.timeout(),
+        }
+        for name, workload_engine in engines.items()
+    }
+
+
+def _use_replica(request: Request) -> bool:
+    # Окно read-your-writes открывает ReadYourWritesMiddleware (память процесса и cookie)
+    claims = get_request_claims(request)
+    return replica_router.use_replica(claims.get("sub") if claims else None, read_primary_until(request))
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         try:
@@ -35,6 +125,52 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_batch_db() -> AsyncGenerator[AsyncSession, None]:
+    """Read-write session of the batch pool for reports and contract payout calculations."""
+    async with BatchSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for endpoints that only read (interactive pool).
+
+    A connection is checked out on the first query only, so requests answered from
+    in-process caches never touch the pool. The READ ONLY transaction is not committed:
+    closing the session ends it and returns the connection.
+    """
+    async with ReadOnlySessionLocal() as session:
+        yield session
+
+
+async def get_replica_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Read-only session for read-heavy endpoints that tolerate slightly stale data.
+
+    Served by the read replica when one is configured, reachable and within
+    REPLICA_MAX_LAG_SECONDS, unless the user has just written; otherwise the same
+    as get_read_db.
+    """
+    async with (ReplicaSessionLocal if _use_replica(request) else ReadOnlySessionLocal)() as session:
+        yield session
+
+
+async def get_report_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Read-only session for dashboards, reports and payout listings.
+
+    Like get_replica_db, but the primary fallback uses the batch pool and its longer
+    statement timeout instead of the interactive pool.
+    """
+    async with (ReplicaSessionLocal if _use_replica(request) else BatchReadOnlySessionLocal)() as session:
+        yield session
+
+
 async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         return session
@@ -1,13 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from app.config import settings
-from app.database import engine
+from app.database import interactive_engine, replica_engine, workload_engines
 from app.models import Base
 from app.tasks import OrderCleanupService
-from app.utils import LoggingMiddleware
+from app.utils import (
+    LoggingMiddleware, AuthContextMiddleware, MetricsMiddleware, ProfilingMiddleware,
+    start_http_logging, stop_http_logging, start_slow_query_log, stop_slow_query_log,
+    instrument_routes, instrument_engine, loop_monitor
+)
+from app.utils.read_your_writes import ReadYourWritesMiddleware
 from app.admin import setup_admin
+from app.services.replica_router import replica_router
 
 # Global task service instance
 task_service = None
@@ -20,6 +28,17 @@ async def lifespan(app: FastAPI):
     print("Starting up Cinema Management System...")
     # Database tables will be created by Alembic migrations
 
+    # Start the background writers of the HTTP request log and the slow-query log
+    start_http_logging()
+    start_slow_query_log()
+
+    # Event loop lag sampler and blocking-call detector
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
+    # Replication lag guard of the optional read replica
+    replica_router.start(replica_engine)
+
     # Initialize and start order cleanup service
     task_service = OrderCleanupService(settings.DATABASE_URL)
     task_service.start_scheduler()
@@ -27,7 +46,7 @@ async def lifespan(app: FastAPI):
 
     # Setup admin panel
     try:
-        setup_admin(app, engine)
+        setup_admin(app, interactive_engine)
     except ImportError as e:
         print(f"Admin panel failed to load: {type(e).__name__}: {e}")
         import traceback
@@ -38,7 +57,14 @@ async def lifespan(app: FastAPI):
     print("Shutting down...")
     if task_service:
         task_service.stop_scheduler()
-    await engine.dispose()
+    await loop_monitor.stop()
+    await replica_router.stop()
+    for workload_engine in workload_engines.values():
+        await workload_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    stop_http_logging()
+    stop_slow_query_log()
 
 
 app = FastAPI(
@@ -59,6 +85,35 @@ app.add_middleware(
 # Logging middleware - should be added early in the middleware chain
 app.add_middleware(LoggingMiddleware)
 
+# Read-your-writes window of the optional read replica, opened before a write's response is sent
+app.add_middleware(ReadYourWritesMiddleware)
+
+# On-demand profiling of requests flagged by super admins (inside AuthContext, which verifies the token)
+app.add_middleware(ProfilingMiddleware)
+
+# Auth context middleware - added last so it runs first and the bearer token is
+# verified once for both the logging middleware and the auth dependencies
+app.add_middleware(AuthContextMiddleware)
+
+# Metrics middleware - outermost, so latency and Server-Timing cover the whole chain
+app.add_middleware(MetricsMiddleware)
+
+# Record SQL execution time and query counts per request, and slow queries
+for workload_engine in workload_engines.values():
+    instrument_engine(workload_engine)
+if replica_engine is not None:
+    instrument_engine(replica_engine)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # The workload's pool is exhausted for longer than its acquire timeout: shed the request
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
 
 @app.get("/")
 async def root():
@@ -78,7 +133,7 @@ async def health_check():
 from app.routers import (
     auth, cinemas, halls, films, genres, sessions,
     bookings, concessions, distributors, contracts, food_categories, promocodes, tickets, payments,
-    users, roles, reports, seats, qr_scanner, dashboard
+    users, roles, reports, seats, qr_scanner, dashboard, metrics, diagnostics
 )
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
@@ -101,6 +156,11 @@ app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(roles.router, prefix="/api/v1/roles", tags=["Roles"])
 app.include_router(reports.router, prefix="/api/v1/reports", tags=["Reports"])
 app.include_router(seats.router, prefix="/api/v1/seats", tags=["Seats"])
+app.include_router(diagnostics.router, prefix="/api/v1/diagnostics", tags=["Diagnostics"])
+app.include_router(metrics.router, tags=["Metrics"])
+
+# Per-route latency histograms - after all routers are included
+instrument_routes(app)
 
 
 if __name__ == "__main__":
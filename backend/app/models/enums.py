@@ -124,6 +124,12 @@ class ConcessionItemStatus(str, Enum):
     DISCONTINUED = "DISCONTINUED"
 
 
+class ConcessionStockLevel(str, Enum):
+    IN_STOCK = "IN_STOCK"
+    LOW_STOCK = "LOW_STOCK"
+    OUT_OF_STOCK = "OUT_OF_STOCK"
+
+
 class PreorderStatus(str, Enum):
     PENDING = "PENDING"
     READY = "READY"
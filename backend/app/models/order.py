@@ -18,7 +18,7 @@ class Order(Base):
     discount_amount = Column(DECIMAL(8, 2), default=0.00)
     final_amount = Column(DECIMAL(12, 2), nullable=False)
     status = Column(SQLEnum(OrderStatus), default=OrderStatus.created, nullable=False)
-    qr_code = Column(String(2000), nullable=True)
+    qr_code = Column(String(500), nullable=True)  # QR payload, the image is rendered on demand
 
     # Relationships
     user = relationship("User", back_populates="orders", foreign_keys=[user_id])
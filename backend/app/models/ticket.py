@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, DECIMAL, DateTime, String, ForeignKey, Enum as SQLEnum, Index, CheckConstraint
+from datetime import datetime
+
+import pytz
+from sqlalchemy import Column, Integer, DECIMAL, DateTime, String, ForeignKey, Enum as SQLEnum, Index, CheckConstraint, text
 from sqlalchemy.orm import relationship
 from .enums import TicketStatus, SalesChannel
 from . import Base
 
 
+def _moscow_now() -> datetime:
+    return datetime.now(pytz.timezone('Europe/Moscow')).replace(tzinfo=None)
+
+
 class Ticket(Base):
     __tablename__ = "tickets"
 
@@ -18,6 +25,13 @@ class Ticket(Base):
     purchase_date = Column(DateTime, nullable=False)
     sales_channel = Column(SQLEnum(SalesChannel), nullable=False)
     status = Column(SQLEnum(TicketStatus), default=TicketStatus.RESERVED, nullable=False)
+    # Time of the last change - version of the gate manifest (also set by bulk update() statements)
+    # Серверное значение по умолчанию на тех же наивных московских часах, что и _moscow_now:
+    # иначе версия манифеста турникетов зависела бы от часового пояса сессии БД
+    updated_at = Column(
+        DateTime, default=_moscow_now, onupdate=_moscow_now,
+        server_default=text("(now() AT TIME ZONE 'Europe/Moscow')"), nullable=False
+    )
 
     # Relationships
     session = relationship("Session", back_populates="tickets")
@@ -33,5 +47,6 @@ class Ticket(Base):
         Index("idx_ticket_buyer", "buyer_id"),
         Index("idx_ticket_order", "order_id"),
         Index("idx_ticket_session_seat", "session_id", "seat_id", unique=True),
+        Index("idx_ticket_updated_at", "updated_at"),
         CheckConstraint("price >= 0", name="check_ticket_price_non_negative"),
     )
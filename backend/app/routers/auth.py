@@ -1,22 +1,28 @@
 from datetime import datetime
 from typing import Annotated
 import pytz
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_db, get_read_db
 from app.models.user import User
 from app.models.bonus_account import BonusAccount
 from app.models.enums import UserStatus
 from app.schemas.user import UserCreate, UserLogin, UserUpdate, UserResponse, Token
-from app.utils.security import verify_password, get_password_hash, create_access_token, create_refresh_token, decode_token
+from app.utils.security import (
+    verify_password_async, get_password_hash_async, password_needs_rehash,
+    create_access_token, create_refresh_token, decode_token
+)
 from app.config import get_settings
+from app.utils.auth_context import PRINCIPAL_STATE_KEY, get_request_claims
+from app.utils.request_timing import measure_section
 import pytz
 from sqlalchemy.orm import selectinload
 
 from app.models import Role
+from app.services.principal_cache import Principal, principal_cache, resolve_principal
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -24,17 +30,24 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 # Dependency to get current user from JWT token
 async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    token: Annotated[str, Depends(oauth2_scheme)]
 ) -> User:
-    """Get current authenticated user from JWT token."""
+    """
+    Get current authenticated user from JWT token.
+
+    The user is loaded on a short-lived session that is closed right after the lookup,
+    so the request does not hold a critical-pool connection until the response is sent.
+    The returned User is detached: add it to the endpoint's session before changing it.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    payload = decode_token(token)
+    # Claims were verified once by AuthContextMiddleware
+    payload = get_request_claims(request, token)
     if payload is None:
         raise credentials_exception
 
@@ -43,9 +56,11 @@ async def get_current_user(
         raise credentials_exception
 
     # Get user from database
-    query = select(User).options(selectinload(User.role)).filter(User.email == email)
-    result = await db.execute(query)
-    user = result.scalar_one_or_none()
+    with measure_section("auth"):
+        async with AsyncSessionLocal() as db:
+            query = select(User).options(selectinload(User.role)).filter(User.email == email)
+            result = await db.execute(query)
+            user = result.scalar_one_or_none()
 
     if user is None:
         raise credentials_exception
@@ -56,9 +71,51 @@ async def get_current_user(
             detail="User account is not active"
         )
 
+    request.scope.setdefault("state", {})[PRINCIPAL_STATE_KEY] = user
     return user
 
 
+async def get_current_principal(
+    request: Request,
+    token: Annotated[str, Depends(oauth2_scheme)]
+) -> Principal:
+    """
+    Get a lightweight snapshot of the current user from JWT token.
+
+    Served from the principal cache in the common case; a cache miss is resolved on a
+    short-lived session, so no database connection is held for the rest of the request.
+    Use get_current_active_user only in endpoints that need the full ORM User.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    # Claims were verified once by AuthContextMiddleware
+    payload = get_request_claims(request, token)
+    if payload is None:
+        raise credentials_exception
+
+    email: str = payload.get("sub")
+    if email is None:
+        raise credentials_exception
+
+    with measure_section("auth"):
+        principal = await resolve_principal(email)
+        if principal is None:
+            raise credentials_exception
+
+    if principal.status != UserStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is not active"
+        )
+
+    request.scope.setdefault("state", {})[PRINCIPAL_STATE_KEY] = principal
+    return principal
+
+
 async def get_current_active_user(
     current_user: Annotated[User, Depends(get_current_user)]
 ) -> User:
@@ -91,7 +148,7 @@ async def register(
     new_user = User(
         role_id=user_role.id,
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash_async(user_data.password),
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         phone=user_data.phone,
@@ -151,7 +208,7 @@ async def login(
     result = await db.execute(select(User).filter(User.email == form_data.username))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -164,6 +221,10 @@ async def login(
             detail="User account is not active"
         )
 
+    # Re-hash with the current work factor while the plain password is at hand
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await get_password_hash_async(form_data.password)
+
     # Update last login
     user.last_login =datetime.now(pytz.timezone('Europe/Moscow')).replace(tzinfo=None)
     await db.commit()
@@ -182,7 +243,7 @@ async def login(
 @router.get("/me", response_model=UserResponse)
 async def get_me(
     current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get current user profile."""
     # Get user's bonus account balance
@@ -226,6 +287,9 @@ async def update_profile(
     if 'email' in update_data:
         del update_data['email']
 
+    # current_user was loaded on the auth dependency's own session
+    db.add(current_user)
+
     # Update only allowed fields
     for field, value in update_data.items():
         setattr(current_user, field, value)
@@ -233,6 +297,7 @@ async def update_profile(
     try:
         await db.commit()
         await db.refresh(current_user)
+        principal_cache.invalidate_user(current_user.id)
 
         # Get updated bonus account balance
         bonus_account_result = await db.execute(
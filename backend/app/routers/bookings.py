@@ -3,28 +3,32 @@ from decimal import Decimal
 from typing import List, Annotated
 
 from app.config import get_settings
-from app.database import get_db
+from app.database import get_db, get_read_db, get_replica_db
 from app.models.bonus_account import BonusAccount
 from app.models.bonus_transaction import BonusTransaction
 from app.models.concession_item import ConcessionItem
 from app.models.concession_preorder import ConcessionPreorder
 from app.models.enums import (
     OrderStatus, TicketStatus, PaymentStatus, SalesChannel,
-    BonusTransactionType, PaymentMethod, PreorderStatus
+    BonusTransactionType, PaymentMethod, PreorderStatus, UserRoles
 )
 from app.models.order import Order
 from app.models.payment import Payment
 from app.models.seat import Seat
 from app.models.session import Session
 from app.models.ticket import Ticket
-from app.models.user import User
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 from app.schemas.order import OrderCreate, OrderWithTickets, OrderWithTicketsAndPayment, PaymentResponsePublic, \
     ConcessionPreorderResponse, ConcessionItemResponse, OrderCountsResponse
 from app.schemas.ticket import TicketResponse
 from app.services.promocode_service import validate_promocode, increment_usage
-from app.utils.qr_generator import generate_qr_code, generate_order_qr
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.services.concession_stock_service import reserve_items, release_order_preorders, aggregate_quantities
+from app.services.qr_image_cache import qr_image_cache
+from app.utils.qr_generator import order_qr_payload, QR_IMAGE_MEDIA_TYPES
+from app.utils.http_cache import etag_matches
+from app.utils.qr_token import issue_order_qr_token
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
 from sqlalchemy import select, and_, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -40,7 +44,7 @@ router = APIRouter()
 @router.post("", response_model=OrderWithTickets, status_code=status.HTTP_201_CREATED)
 async def create_booking(
     booking_data: OrderCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new booking with tickets."""
@@ -111,7 +115,9 @@ async def create_booking(
             "session_id": ticket_data.session_id,
             "seat_id": ticket_data.seat_id,
             "price": ticket_price,
-            "sales_channel": ticket_data.sales_channel
+            "sales_channel": ticket_data.sales_channel,
+            "start_datetime": session.start_datetime,
+            "end_datetime": session.end_datetime
         })
 
     # Apply promocode if provided
@@ -139,32 +145,36 @@ async def create_booking(
         discount_amount = validation_result.discount_amount
         promocode_id = promocode.id
 
-        # Increment usage count (will be committed later with the order)
-        await increment_usage(db, promocode)
+        # Increment usage count atomically (will be committed later with the order)
+        if not await increment_usage(db, promocode):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Достигнут лимит использования промокода"
+            )
 
     # Add concession items to the total amount before applying bonuses
     # This ensures bonus calculations include the full order amount
     if booking_data.concession_preorders:
-        for preorder_data in booking_data.concession_preorders:
-            # Validate concession item exists
-            concession_item_result = await db.execute(
-                select(ConcessionItem)
-                .filter(ConcessionItem.id == preorder_data.concession_item_id)
-            )
-            concession_item = concession_item_result.scalar_one_or_none()
+        # Reserve stock for the whole cart with one conditional UPDATE (oversell-proof without locks)
+        reservation = await reserve_items(db, aggregate_quantities(
+            (preorder_data.concession_item_id, preorder_data.quantity)
+            for preorder_data in booking_data.concession_preorders
+        ))
 
-            if not concession_item:
+        if not reservation.is_reserved:
+            failed_item_id = reservation.failed_item_ids[0]
+            if failed_item_id not in reservation.available:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Товар из кинобара с id {preorder_data.concession_item_id} не найден"
+                    detail=f"Товар из кинобара с id {failed_item_id} не найден"
                 )
 
-            if concession_item.stock_quantity < preorder_data.quantity:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Недостаточно товара {preorder_data.concession_item_id} на складе. Доступно: {concession_item.stock_quantity}"
-                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Недостаточно товара {failed_item_id} на складе. Доступно: {reservation.available[failed_item_id]}"
+            )
 
+        for preorder_data in booking_data.concession_preorders:
             # Calculate total price for this concession item
             total_price = Decimal(str(preorder_data.unit_price)) * Decimal(str(preorder_data.quantity))
 
@@ -250,9 +260,13 @@ async def create_booking(
         )
         db.add(bonus_transaction)
 
-    # Generate QR code for the order
-    order_qr = generate_order_qr(new_order.id)
-    new_order.qr_code = order_qr
+    # Store only the signed QR payload - the image is rendered on demand by GET /{order_id}/qr.png.
+    # Gates verify the token in memory (see qr_scanner) and touch the DB only to mark tickets used.
+    qr_token = issue_order_qr_token(new_order.id, [
+        (t["session_id"], t["seat_id"], t["start_datetime"], t["end_datetime"]) for t in tickets_to_create
+    ])
+    # Very large group orders do not fit the column - they keep the unsigned payload checked against the DB
+    new_order.qr_code = qr_token if len(qr_token) <= Order.qr_code.type.length else order_qr_payload(new_order.id)
 
     # Create tickets
     created_tickets = []
@@ -287,14 +301,7 @@ async def create_booking(
                 status=PreorderStatus.PENDING,
             )
 
-            # Update stock
-            concession_item_result = await db.execute(
-                select(ConcessionItem)
-                .filter(ConcessionItem.id == preorder_data.concession_item_id)
-            )
-            concession_item = concession_item_result.scalar_one_or_none()
-            concession_item.stock_quantity -= preorder_data.quantity
-
+            # Stock was already reserved above
             db.add(new_preorder)
             created_concession_preorders.append(new_preorder)
 
@@ -370,8 +377,8 @@ def is_order_active(order: Order, earliest_session_time: datetime) -> bool:
 
 @router.get("/my/counts", response_model=OrderCountsResponse)
 async def get_my_orders_counts(
-        current_user: Annotated[User, Depends(get_current_active_user)],
-        db: AsyncSession = Depends(get_db)
+        current_user: Annotated[Principal, Depends(get_current_principal)],
+        db: AsyncSession = Depends(get_replica_db)
 ):
     """Get count of active and past orders for current user."""
     from datetime import datetime
@@ -435,8 +442,8 @@ async def get_my_orders_counts(
 
 @router.get("/my/active/count", response_model=int)
 async def get_my_active_orders_count(
-        current_user: Annotated[User, Depends(get_current_active_user)],
-        db: AsyncSession = Depends(get_db)
+        current_user: Annotated[Principal, Depends(get_current_principal)],
+        db: AsyncSession = Depends(get_replica_db)
 ):
     """Get count of active orders for current user."""
     from datetime import datetime
@@ -490,8 +497,8 @@ async def get_my_active_orders_count(
 
 @router.get("/my/past/count", response_model=int)
 async def get_my_past_orders_count(
-        current_user: Annotated[User, Depends(get_current_active_user)],
-        db: AsyncSession = Depends(get_db)
+        current_user: Annotated[Principal, Depends(get_current_principal)],
+        db: AsyncSession = Depends(get_replica_db)
 ):
     """Get count of past orders for current user."""
     from datetime import datetime
@@ -543,7 +550,7 @@ async def get_my_past_orders_count(
 @router.post("/{order_id}/cancel", status_code=status.HTTP_200_OK)
 async def cancel_pending_order(
     order_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Cancel a pending order before payment is completed."""
@@ -582,22 +589,8 @@ async def cancel_pending_order(
     for ticket in tickets:
         ticket.status = TicketStatus.CANCELLED  # Return to available since payment wasn't completed
 
-    # Update concession preorders
-    preorders_result = await db.execute(
-        select(ConcessionPreorder).filter(ConcessionPreorder.order_id == order.id)
-    )
-    preorders = preorders_result.scalars().all()
-
-    for preorder in preorders:
-        # Return items to inventory by changing status back
-        preorder.status = PreorderStatus.CANCELLED
-        # Update concession item quantity to return stock
-        from app.models.concession_item import ConcessionItem
-        await db.execute(
-            update(ConcessionItem)
-            .where(ConcessionItem.id == preorder.concession_item_id)
-            .values(stock_quantity=ConcessionItem.stock_quantity + preorder.quantity)
-        )
+    # Cancel concession preorders and return their items to inventory with one aggregated update
+    await release_order_preorders(db, [order.id])
 
     # Return bonus points that were used for the order if any
     bonus_account_result = await db.execute(
@@ -675,7 +668,7 @@ async def cancel_pending_order(
 @router.post("/{order_id}/return", status_code=status.HTTP_200_OK)
 async def return_order(
     order_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Return an order and process refund according to the rules."""
@@ -774,17 +767,8 @@ async def return_order(
     for ticket in tickets:
         ticket.status = TicketStatus.CANCELLED
 
-    # 2. Return concession preorders to inventory (preorders already fetched above)
-    for preorder in preorders:
-        # Return items to inventory by changing status back
-        preorder.status = PreorderStatus.CANCELLED
-        # Update concession item quantity
-        concession_item_result = await db.execute(
-            select(ConcessionItem).filter(ConcessionItem.id == preorder.concession_item_id)
-        )
-        concession_item = concession_item_result.scalar_one_or_none()
-        if concession_item:
-            concession_item.stock_quantity += preorder.quantity
+    # 2. Cancel concession preorders and return them to inventory with one aggregated update
+    await release_order_preorders(db, [order.id])
 
     # 3. Process bonus return - return bonuses that were used for the order and remove bonuses that were accrued for the order
     bonus_account_result = await db.execute(
@@ -897,8 +881,8 @@ async def return_order(
 @router.get("/qr/{qr_code}")
 async def get_order_by_qr(
     qr_code: str,
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get order by QR code - for admin/controller use."""
     # First, check if QR code matches an order
@@ -980,11 +964,53 @@ async def get_order_by_qr(
     )
 
 
+@router.get("/{order_id}/qr.{image_format}")
+async def get_order_qr_image(
+    order_id: int,
+    image_format: str,
+    request: Request,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Render the QR code of an order as PNG or SVG (owner or staff only)."""
+    if image_format not in QR_IMAGE_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Поддерживаются только форматы png и svg"
+        )
+
+    result = await db.execute(
+        select(Order.user_id, Order.qr_code).filter(Order.id == order_id)
+    )
+    order = result.one_or_none()
+
+    is_staff = current_user.role is not None and current_user.role.name in [
+        UserRoles.admin, UserRoles.super_admin, UserRoles.staff
+    ]
+    if not order or not order.qr_code or (order.user_id != current_user.id and not is_staff):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="QR-код заказа не найден"
+        )
+
+    settings = get_settings()
+    image, digest = await qr_image_cache.get_image(order.qr_code, image_format)
+    headers = {
+        # Картинка определяется только payload, а URL из ответов содержит его хеш
+        "Cache-Control": f"private, max-age={settings.QR_IMAGE_MAX_AGE_SECONDS}, immutable",
+        # PNG и SVG одного payload - разные представления, у каждого свой ETag
+        "ETag": f'"{digest}-{image_format}"',
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=image, media_type=QR_IMAGE_MEDIA_TYPES[image_format], headers=headers)
+
+
 @router.get("/pickup/{pickup_code}")
 async def get_orders_by_pickup_code(
     pickup_code: str,
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get orders by pickup code for concession staff."""
     result = await db.execute(
@@ -1070,7 +1096,7 @@ class UpdateOrderStatusRequest(BaseModel):
 async def update_order_status(
     order_id: int,
     status_update: UpdateOrderStatusRequest,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update order status - for admin use."""
@@ -1111,8 +1137,8 @@ async def update_order_status(
 
 @router.get("/my", response_model=List[OrderWithTicketsAndPayment])
 async def get_my_bookings(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_replica_db)
 ):
     """Get all bookings for current user."""
     # This endpoint returns all bookings - keeping for compatibility
@@ -1211,10 +1237,10 @@ async def get_my_bookings(
 
 @router.get("/my/paginated", response_model=List[OrderWithTicketsAndPayment])
 async def get_my_bookings_paginated(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     skip: int = 0,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_replica_db)
 ):
     """Get paginated bookings for current user."""
     result = await db.execute(
@@ -1315,10 +1341,10 @@ async def get_my_bookings_paginated(
 
 @router.get("/my/active", response_model=List[OrderWithTicketsAndPayment])
 async def get_my_active_orders(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     skip: int = 0,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_replica_db)
 ):
     """Get paginated active orders for current user."""
     moscow_tz = pytz.timezone('Europe/Moscow')
@@ -1459,10 +1485,10 @@ async def get_my_active_orders(
 
 @router.get("/my/past", response_model=List[OrderWithTicketsAndPayment])
 async def get_my_past_orders(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     skip: int = 0,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_replica_db)
 ):
     """Get paginated past orders for current user."""
     moscow_tz = pytz.timezone('Europe/Moscow')
@@ -1609,7 +1635,7 @@ async def get_my_past_orders(
 #
 # @router.get("/my/counts", response_model=OrderCountsResponse)
 # async def get_my_orders_counts(
-#         current_user: Annotated[User, Depends(get_current_active_user)],
+#         current_user: Annotated[Principal, Depends(get_current_principal)],
 #         db: AsyncSession = Depends(get_db)
 # ):
 #     """Get count of active and past orders for current user."""
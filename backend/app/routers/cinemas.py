@@ -3,12 +3,12 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.cinema import Cinema
-from app.models.user import User
 from app.models.enums import CinemaStatus
 from app.schemas.cinema import CinemaCreate, CinemaUpdate, CinemaResponse
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
@@ -19,7 +19,7 @@ async def get_cinemas(
     status_filter: CinemaStatus | None = Query(None, alias="status", description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of cinemas with optional filters."""
     query = select(Cinema)
@@ -40,7 +40,7 @@ async def get_cinemas(
 @router.get("/{cinema_id}", response_model=CinemaResponse)
 async def get_cinema(
     cinema_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get cinema by ID."""
     result = await db.execute(select(Cinema).filter(Cinema.id == cinema_id))
@@ -58,7 +58,7 @@ async def get_cinema(
 @router.post("", response_model=CinemaResponse, status_code=status.HTTP_201_CREATED)
 async def create_cinema(
     cinema_data: CinemaCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new cinema (admin only)."""
@@ -88,7 +88,7 @@ async def create_cinema(
 async def update_cinema(
     cinema_id: int,
     cinema_data: CinemaUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update cinema (admin only)."""
@@ -117,7 +117,7 @@ async def update_cinema(
 @router.delete("/{cinema_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_cinema(
     cinema_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete cinema (admin only)."""
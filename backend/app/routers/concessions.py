@@ -1,25 +1,30 @@
 from typing import List, Annotated
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert
 from sqlalchemy.orm import selectinload
 from decimal import Decimal
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.config import get_settings
 from app.models.concession_item import ConcessionItem
 from app.models.concession_preorder import ConcessionPreorder
 from app.models.order import Order
 from app.models.promocode import Promocode
 from app.models.ticket import Ticket
-from app.models.user import User
 from app.models.enums import ConcessionItemStatus, PreorderStatus, DiscountType, UserRoles
 from app.schemas.concession import (
-    ConcessionItemCreate, ConcessionItemUpdate, ConcessionItemResponse,
-    ConcessionPreorderCreate, ConcessionPreorderResponse
+    ConcessionItemCreate, ConcessionItemUpdate, ConcessionItemResponse, ConcessionMenuItemResponse,
+    ConcessionPreorderCreate, ConcessionPreorderResponse, PrepQueueResponse
 )
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
+from app.services.concession_stock_service import reserve_items, aggregate_quantities
+from app.services.concession_menu_cache import concession_menu_cache
+from app.utils.http_cache import etag_matches
+from app.services.prep_queue import get_prep_queue, stream_prep_queue, parse_window, mark_prep_queue_changed
 import secrets
 
 router = APIRouter()
@@ -27,12 +32,12 @@ router = APIRouter()
 
 @router.get("", response_model=List[ConcessionItemResponse])
 async def get_concession_items(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     cinema_id: int | None = Query(None, description="Filter by cinema ID"),
     status_filter: ConcessionItemStatus | None = Query(None, alias="status", description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of concession items."""
     query = select(ConcessionItem).options(selectinload(ConcessionItem.category))
@@ -53,39 +58,111 @@ async def get_concession_items(
     return items
 
 
-@router.get("/public", response_model=List[ConcessionItemResponse])
+@router.get("/public", response_model=List[ConcessionMenuItemResponse])
 async def get_public_concession_items(
+    request: Request,
     cinema_id: int = Query(..., description="Filter by cinema ID"),
     status_filter: ConcessionItemStatus | None = Query(None, alias="status", description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get list of concession items without authentication (for public viewing)."""
-    query = select(ConcessionItem).options(selectinload(ConcessionItem.category))
+    """
+    Get the public concession menu of a cinema without authentication.
 
-    # Filter by cinema_id (required for public endpoint)
-    query = query.filter(ConcessionItem.cinema_id == cinema_id)
+    Served from a per-cinema cached snapshot with coarse stock levels and supports
+    conditional requests via ETag / If-None-Match.
+    """
+    snapshot = await concession_menu_cache.get(db, cinema_id)
 
-    # Only show available items for public by default
-    # If status_filter is provided, use that instead
-    if status_filter:
-        query = query.filter(ConcessionItem.status == status_filter)
-    else:
-        # Default to showing only available items for public
-        query = query.filter(ConcessionItem.status == ConcessionItemStatus.AVAILABLE)
+    # Default to showing only available items for public
+    body, etag = snapshot.render(status_filter or ConcessionItemStatus.AVAILABLE, skip, limit)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={get_settings().CONCESSION_MENU_MAX_AGE_SECONDS}",
+    }
 
-    query = query.order_by(ConcessionItem.name.asc()).offset(skip).limit(limit)
-    result = await db.execute(query)
-    items = result.scalars().all()
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    return items
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _resolve_prep_queue_request(current_user: Principal, cinema_id: int | None, window: str):
+    """Check staff rights and resolve the cinema and time window of a prep queue request."""
+    if current_user.role.name not in [UserRoles.admin, UserRoles.super_admin, UserRoles.staff]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and staff can view the prep queue"
+        )
+
+    if cinema_id is None:
+        cinema_id = current_user.cinema_id
+    if cinema_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cinema_id is required"
+        )
+
+    if current_user.role.name != UserRoles.super_admin and current_user.cinema_id and cinema_id != current_user.cinema_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view the prep queue of your own cinema"
+        )
+
+    try:
+        window_delta = parse_window(window)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return cinema_id, window_delta
+
+
+@router.get("/prep-queue", response_model=PrepQueueResponse)
+async def get_concession_prep_queue(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    cinema_id: int | None = Query(None, description="Cinema ID (defaults to the staff member's cinema)"),
+    window: str = Query("30m", description="Look-ahead window for session start, e.g. 30m or 2h"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the concession prep queue - for concession staff use.
+
+    For each session starting within the window, returns the aggregated quantity per
+    concession item across PENDING preorders of paid orders.
+    """
+    cinema_id, window_delta = _resolve_prep_queue_request(current_user, cinema_id, window)
+    return await get_prep_queue(db, cinema_id, window_delta)
+
+
+@router.get("/prep-queue/stream")
+async def stream_concession_prep_queue(
+    request: Request,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    cinema_id: int | None = Query(None, description="Cinema ID (defaults to the staff member's cinema)"),
+    window: str = Query("30m", description="Look-ahead window for session start, e.g. 30m or 2h")
+):
+    """
+    Stream the concession prep queue as Server-Sent Events.
+
+    Sends a full `snapshot` first, then `session` / `session_removed` events as
+    preorders are paid, added, completed or cancelled.
+    """
+    cinema_id, window_delta = _resolve_prep_queue_request(current_user, cinema_id, window)
+    return StreamingResponse(
+        stream_prep_queue(request, cinema_id, window_delta),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/{item_id}", response_model=ConcessionItemResponse)
 async def get_concession_item(
     item_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get concession item by ID."""
     result = await db.execute(
@@ -107,7 +184,7 @@ async def get_concession_item(
 @router.post("", response_model=ConcessionItemResponse, status_code=status.HTTP_201_CREATED)
 async def create_concession_item(
     item_data: ConcessionItemCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new concession item."""
@@ -127,6 +204,7 @@ async def create_concession_item(
     db.add(new_item)
     await db.commit()
     await db.refresh(new_item)
+    concession_menu_cache.invalidate(new_item.cinema_id)
 
     # Load the item with the category using a query to ensure relationships are accessible
     result = await db.execute(
@@ -143,7 +221,7 @@ async def create_concession_item(
 async def update_concession_item(
     item_id: int,
     item_data: ConcessionItemUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update concession item."""
@@ -163,6 +241,7 @@ async def update_concession_item(
 
     await db.commit()
     await db.refresh(item)
+    concession_menu_cache.invalidate(item.cinema_id)
 
     # Load the updated item with the category using a query to ensure relationships are accessible
     result = await db.execute(
@@ -178,7 +257,7 @@ async def update_concession_item(
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_concession_item(
     item_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete concession item."""
@@ -193,6 +272,7 @@ async def delete_concession_item(
 
     await db.delete(item)
     await db.commit()
+    concession_menu_cache.invalidate(item.cinema_id)
 
     return None
 
@@ -200,7 +280,7 @@ async def delete_concession_item(
 @router.post("/preorder", response_model=ConcessionPreorderResponse, status_code=status.HTTP_201_CREATED)
 async def create_preorder(
     preorder_data: ConcessionPreorderCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a concession preorder."""
@@ -238,10 +318,12 @@ async def create_preorder(
             detail="Concession item is not available"
         )
 
-    if item.stock_quantity < preorder_data.quantity:
+    # Reserve stock with a conditional UPDATE so concurrent buyers cannot oversell
+    reservation = await reserve_items(db, {item.id: preorder_data.quantity})
+    if not reservation.is_reserved:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Insufficient stock. Available: {item.stock_quantity}"
+            detail=f"Insufficient stock. Available: {reservation.available.get(item.id, 0)}"
         )
 
     # Calculate total price
@@ -272,9 +354,6 @@ async def create_preorder(
         status=PreorderStatus.PENDING
     )
 
-    # Update stock
-    item.stock_quantity -= preorder_data.quantity
-
     db.add(new_preorder)
 
     # Update order amounts to include the new concession item
@@ -307,6 +386,7 @@ async def create_preorder(
         order.total_amount = total_with_concessions
         order.final_amount = new_final_amount
 
+    mark_prep_queue_changed(db)
     await db.commit()
     await db.refresh(new_preorder)
 
@@ -325,7 +405,7 @@ async def create_preorder(
 @router.post("/preorder-batch", status_code=status.HTTP_201_CREATED)
 async def create_preorder_batch(
     preorders_data: List[ConcessionPreorderCreate],
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create multiple concession preorders for the same order with shared pickup code."""
@@ -337,7 +417,11 @@ async def create_preorder_batch(
 
     # Verify all items belong to the same order and user
     order_id = preorders_data[0].order_id
-    result = await db.execute(select(Order).filter(Order.id == order_id))
+    result = await db.execute(
+        select(Order)
+        .options(selectinload(Order.promocode))
+        .filter(Order.id == order_id)
+    )
     order = result.scalar_one_or_none()
 
     if not order:
@@ -352,19 +436,22 @@ async def create_preorder_batch(
             detail="You can only create preorders for your own orders"
         )
 
+    if any(preorder_data.order_id != order_id for preorder_data in preorders_data):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="All preorders must belong to the same order"
+        )
+
+    # Load all referenced items with one IN-query
+    item_ids = {preorder_data.concession_item_id for preorder_data in preorders_data}
+    result = await db.execute(
+        select(ConcessionItem).filter(ConcessionItem.id.in_(item_ids))
+    )
+    items_by_id = {item.id: item for item in result.scalars().all()}
+
     # Check all items before creating any preorders
-    items_and_quantities = []
     for preorder_data in preorders_data:
-        if preorder_data.order_id != order_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="All preorders must belong to the same order"
-            )
-
-        result = await db.execute(
-            select(ConcessionItem).filter(ConcessionItem.id == preorder_data.concession_item_id)
-        )
-        item = result.scalar_one_or_none()
+        item = items_by_id.get(preorder_data.concession_item_id)
 
         if not item:
             raise HTTPException(
@@ -378,125 +465,110 @@ async def create_preorder_batch(
                 detail=f"Concession item {preorder_data.concession_item_id} is not available"
             )
 
-        if item.stock_quantity < preorder_data.quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient stock for item {preorder_data.concession_item_id}. Available: {item.stock_quantity}"
-            )
-
-        items_and_quantities.append((item, preorder_data))
+    # Reserve stock for all line items with one conditional UPDATE
+    reservation = await reserve_items(db, aggregate_quantities(
+        (preorder_data.concession_item_id, preorder_data.quantity) for preorder_data in preorders_data
+    ))
+    if not reservation.is_reserved:
+        failed_item_id = reservation.failed_item_ids[0]
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient stock for item {failed_item_id}. Available: {reservation.available.get(failed_item_id, 0)}"
+        )
 
     # Generate a single pickup code for all items in this order
     pickup_code = f"PKP-{secrets.token_hex(3).upper()}"
 
-    # Now create all preorders with the same pickup code
-    created_preorders = []
-    for item, preorder_data in items_and_quantities:
-        total_price = preorder_data.unit_price * preorder_data.quantity
-
-        new_preorder = ConcessionPreorder(
-            order_id=preorder_data.order_id,
-            concession_item_id=preorder_data.concession_item_id,
-            quantity=preorder_data.quantity,
-            unit_price=preorder_data.unit_price,
-            total_price=total_price,
-            pickup_code=pickup_code,
-            status=PreorderStatus.PENDING
-        )
-
-        # Update stock
-        item.stock_quantity -= preorder_data.quantity
-
-        db.add(new_preorder)
-        created_preorders.append(new_preorder)
-
-    # Get the order to update its amounts
-    order_result = await db.execute(select(Order).filter(Order.id == order_id))
-    order = order_result.scalar_one_or_none()
+    # Insert all preorders with the same pickup code in a single bulk statement
+    result = await db.scalars(
+        insert(ConcessionPreorder).returning(ConcessionPreorder),
+        [
+            {
+                "order_id": preorder_data.order_id,
+                "concession_item_id": preorder_data.concession_item_id,
+                "quantity": preorder_data.quantity,
+                "unit_price": preorder_data.unit_price,
+                "total_price": preorder_data.unit_price * preorder_data.quantity,
+                "pickup_code": pickup_code,
+                "status": PreorderStatus.PENDING,
+            }
+            for preorder_data in preorders_data
+        ]
+    )
+    created_preorders = result.all()
 
-    if order:
-        # Calculate the total concession amount for this order
-        concession_total_result = await db.execute(
-            select(func.sum(ConcessionPreorder.total_price))
+    # Recompute ticket and concession totals with one combined aggregate
+    totals_result = await db.execute(
+        select(
+            select(func.coalesce(func.sum(ConcessionPreorder.total_price), 0))
             .filter(ConcessionPreorder.order_id == order_id)
-        )
-        concession_total_amount = concession_total_result.scalar() or Decimal("0.00")
-
-        # Calculate original ticket total to reconstruct the full calculation
-        ticket_total_result = await db.execute(
-            select(func.sum(Ticket.price))
+            .scalar_subquery()
+            .label("concession_total"),
+            select(func.coalesce(func.sum(Ticket.price), 0))
             .filter(Ticket.order_id == order_id)
+            .scalar_subquery()
+            .label("ticket_total"),
         )
-        ticket_total_amount = ticket_total_result.scalar() or Decimal("0.00")
+    )
+    totals = totals_result.one()
+    concession_total_amount = Decimal(totals.concession_total)
+    ticket_total_amount = Decimal(totals.ticket_total)
+
+    # Calculate base total (tickets + concessions) before any discounts
+    base_total = ticket_total_amount + concession_total_amount
+
+    # Calculate original discount proportions for proper recalculation
+    # Split the original discount between promocode and bonus portions if both were used
+    original_promo_discount = Decimal("0.00")
+    original_bonus_deduction = Decimal("0.00")
+
+    # The promocode was eagerly loaded together with the order
+    promocode = order.promocode
+    if promocode:
+        # If promocode is percentage-based, calculate based on original ticket total
+        if promocode.discount_type == DiscountType.PERCENTAGE:
+            original_promo_discount = (ticket_total_amount * promocode.discount_value / Decimal("100")).quantize(Decimal("0.01"))
+        else:
+            # FIXED_AMOUNT promocode - use fixed value but cap at total amount
+            original_promo_discount = min(promocode.discount_value, ticket_total_amount)
+
+    # Calculate original bonus deduction from total discount minus promocode discount
+    original_bonus_deduction = max(Decimal("0.00"), order.discount_amount - original_promo_discount)
+
+    # For the new total (with concession items), we'll apply the same promotion logic
+    # The promocode discount should be recalculated based on the new total if it's percentage-based
+    new_promo_discount = Decimal("0.00")
+    if promocode:
+        if promocode.discount_type == DiscountType.PERCENTAGE:
+            # For percentage promocodes, apply the same percentage to the new total
+            new_promo_discount = (base_total * promocode.discount_value / Decimal("100")).quantize(Decimal("0.01"))
+        else:
+            # For fixed amount promocodes, keep the same fixed amount but make sure it doesn't exceed total
+            new_promo_discount = min(promocode.discount_value, base_total)
 
-        # Calculate base total (tickets + concessions) before any discounts
-        base_total = ticket_total_amount + concession_total_amount
+    # Calculate new bonus deduction based on remaining amount after promo discount
+    settings = get_settings()
 
-        # Calculate original discount proportions for proper recalculation
-        # Split the original discount between promocode and bonus portions if both were used
-        original_promo_discount = Decimal("0.00")
-        original_bonus_deduction = Decimal("0.00")
+    # Apply bonus deduction rules: max percentage of amount after promo discount
+    max_bonus_for_new_total = (base_total - new_promo_discount) * Decimal(settings.BONUS_MAX_PERCENTAGE) / Decimal("100")
+    new_bonus_deduction = min(original_bonus_deduction, max_bonus_for_new_total)
 
-        # Get the promocode for this order separately to ensure it's properly loaded
-        if order.promocode_id:
-            promocode_result = await db.execute(
-                select(Promocode).filter(Promocode.id == order.promocode_id)
-            )
-            promocode = promocode_result.scalar_one_or_none()
-
-            if promocode:
-                # Get original promocode discount value
-                original_promo_discount = promocode.discount_value if promocode else Decimal("0.00")
-
-                # If promocode is percentage-based, calculate based on original ticket total
-                if promocode.discount_type == DiscountType.PERCENTAGE:
-                    original_promo_discount = (ticket_total_amount * promocode.discount_value / Decimal("100")).quantize(Decimal("0.01"))
-                else:
-                    # FIXED_AMOUNT promocode - use fixed value but cap at total amount
-                    original_promo_discount = min(promocode.discount_value, ticket_total_amount)
-        else:
-            promocode = None
-
-        # Calculate original bonus deduction from total discount minus promocode discount
-        original_bonus_deduction = max(Decimal("0.00"), order.discount_amount - original_promo_discount)
-
-        # For the new total (with concession items), we'll apply the same promotion logic
-        # The promocode discount should be recalculated based on the new total if it's percentage-based
-        new_promo_discount = Decimal("0.00")
-        if promocode:
-            if promocode.discount_type == DiscountType.PERCENTAGE:
-                # For percentage promocodes, apply the same percentage to the new total
-                new_promo_discount = (base_total * promocode.discount_value / Decimal("100")).quantize(Decimal("0.01"))
-            else:
-                # For fixed amount promocodes, keep the same fixed amount but make sure it doesn't exceed total
-                new_promo_discount = min(promocode.discount_value, base_total)
-
-        # Calculate new bonus deduction based on remaining amount after promo discount
-        settings = get_settings()
-
-        # Apply bonus deduction rules: max percentage of amount after promo discount
-        max_bonus_for_new_total = (base_total - new_promo_discount) * Decimal(settings.BONUS_MAX_PERCENTAGE) / Decimal("100")
-        new_bonus_deduction = min(original_bonus_deduction, max_bonus_for_new_total)
-
-        # Ensure final amount doesn't go below minimum allowed payment amount
-        potential_final_amount = base_total - new_promo_discount - new_bonus_deduction
-        if potential_final_amount < Decimal(settings.BONUS_MIN_PAYMENT_AMOUNT):
-            # Adjust bonus deduction to ensure minimum payment is met
-            new_bonus_deduction = max(Decimal("0.00"), base_total - new_promo_discount - Decimal(settings.BONUS_MIN_PAYMENT_AMOUNT))
-
-        # Final calculation following frontend logic: total - promo_discount - bonus_deduction
-        new_final_amount = base_total - new_promo_discount - new_bonus_deduction
-
-        # Update order amounts to reflect new totals
-        order.total_amount = base_total
-        order.discount_amount = new_promo_discount + new_bonus_deduction  # Combined discount amount
-        order.final_amount = new_final_amount
+    # Ensure final amount doesn't go below minimum allowed payment amount
+    potential_final_amount = base_total - new_promo_discount - new_bonus_deduction
+    if potential_final_amount < Decimal(settings.BONUS_MIN_PAYMENT_AMOUNT):
+        # Adjust bonus deduction to ensure minimum payment is met
+        new_bonus_deduction = max(Decimal("0.00"), base_total - new_promo_discount - Decimal(settings.BONUS_MIN_PAYMENT_AMOUNT))
 
-    await db.commit()
+    # Final calculation following frontend logic: total - promo_discount - bonus_deduction
+    new_final_amount = base_total - new_promo_discount - new_bonus_deduction
 
-    # Refresh all created preorders
-    for preorder in created_preorders:
-        await db.refresh(preorder)
+    # Update order amounts to reflect new totals
+    order.total_amount = base_total
+    order.discount_amount = new_promo_discount + new_bonus_deduction  # Combined discount amount
+    order.final_amount = new_final_amount
+
+    mark_prep_queue_changed(db)
+    await db.commit()
 
     # Return the first preorder response (they all have the same pickup code)
     first_preorder = created_preorders[0]
@@ -515,7 +587,7 @@ async def create_preorder_batch(
 @router.post("/concession_preorders/{preorder_id}/complete")
 async def mark_concession_item_as_completed(
     preorder_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Mark a concession preorder as completed - for concession staff use."""
@@ -540,6 +612,7 @@ async def mark_concession_item_as_completed(
 
     # Update the status to completed
     preorder.status = PreorderStatus.COMPLETED
+    mark_prep_queue_changed(db)
     await db.commit()
     await db.refresh(preorder)
 
@@ -7,18 +7,18 @@ from sqlalchemy.orm import selectinload
 import logging
 import pytz
 
-from app.database import get_db
+from app.database import get_db, get_batch_db, get_read_db, get_report_db
 from app.models.rental_contract import RentalContract
 from app.models.payment_history import PaymentHistory
 from app.models.film import Film
 from app.models.distributor import Distributor
 from app.models.cinema import Cinema
-from app.models.user import User
 from app.models.enums import ContractStatus, PaymentStatus
 from app.schemas.contract import RentalContractCreate, RentalContractUpdate, RentalContractResponse
 from app.schemas.payment_history import PaymentHistoryResponse
 from app.schemas.cinema import CinemaResponse
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 logger = logging.getLogger(__name__)
 
@@ -33,8 +33,8 @@ async def get_contracts(
     status_filter: ContractStatus | None = Query(None, alias="status", description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
-    current_user: Annotated[User, Depends(get_current_active_user)] = None
+    db: AsyncSession = Depends(get_report_db),
+    current_user: Annotated[Principal, Depends(get_current_principal)] = None
 ):
     """Get list of rental contracts with optional filters."""
 
@@ -65,8 +65,8 @@ async def get_contracts(
 
 @router.get("/cinemas", response_model=List[CinemaResponse])
 async def get_available_cinemas(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get available cinemas based on user role - admin gets only their cinema, super_admin gets all."""
     if current_user.role.name in ["admin", "staff"]:
@@ -91,7 +91,7 @@ async def get_available_cinemas(
 @router.get("/{contract_id}", response_model=RentalContractResponse)
 async def get_contract(
     contract_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_report_db)
 ):
     """Get rental contract by ID."""
     result = await db.execute(select(RentalContract).filter(RentalContract.id == contract_id))
@@ -109,7 +109,7 @@ async def get_contract(
 @router.post("", response_model=RentalContractResponse, status_code=status.HTTP_201_CREATED)
 async def create_contract(
     contract_data: RentalContractCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new rental contract with validation."""
@@ -236,7 +236,7 @@ async def create_contract(
 async def update_contract(
     contract_id: int,
     contract_data: RentalContractUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update rental contract (limited fields)."""
@@ -263,7 +263,7 @@ async def update_contract(
 @router.delete("/{contract_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_contract(
     contract_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete rental contract."""
@@ -285,8 +285,8 @@ async def delete_contract(
 @router.get("/{contract_id}/payments", response_model=List[PaymentHistoryResponse])
 async def get_contract_payments(
     contract_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_report_db)
 ):
     """Get payment history for a rental contract."""
     # Verify contract exists
@@ -326,7 +326,7 @@ async def get_contract_payments(
 async def mark_payment_as_paid(
     contract_id: int,
     payment_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Mark a contract payment as paid."""
@@ -417,8 +417,8 @@ async def mark_payment_as_paid(
 @router.post("/{contract_id}/payments", response_model=PaymentHistoryResponse)
 async def create_contract_payment(
     contract_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_batch_db)
 ):
     """Create a payment for a rental contract by calculating revenue and applying distributor percentage."""
     # Verify user has proper permissions
@@ -533,9 +533,9 @@ async def create_contract_payment(
 
 @router.get("/payments/all", response_model=List[PaymentHistoryResponse])
 async def get_all_payments(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     cinema_id: Optional[int] = Query(None, description="Filter by cinema ID for admin users"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_report_db)
 ):
     """Get all payments (all statuses) with optional cinema filter for admin users."""
     # Verify user has proper permissions
@@ -585,9 +585,9 @@ async def get_all_payments(
 
 @router.get("/payments/pending", response_model=List[PaymentHistoryResponse])
 async def get_pending_payments(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     cinema_id: Optional[int] = Query(None, description="Filter by cinema ID for admin users"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_report_db)
 ):
     """Get all pending payments with optional cinema filter for admin users."""
     # Verify user has proper permissions
@@ -636,7 +636,7 @@ async def get_pending_payments(
 @router.post("/payments/{payment_id}/pay", response_model=PaymentHistoryResponse)
 async def pay_contract_payment(
     payment_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Pay a specific contract payment (global payment endpoint)."""
@@ -5,7 +5,7 @@ from sqlalchemy import select, func, and_
 from datetime import datetime
 import pytz
 
-from app.database import get_db
+from app.database import get_report_db
 from app.models.user import User
 from app.models.order import Order
 from app.models.ticket import Ticket
@@ -14,7 +14,8 @@ from app.models.film import Film
 from app.models.cinema import Cinema
 from app.models.hall import Hall
 from app.models.enums import UserRoles, OrderStatus, TicketStatus
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -30,8 +31,8 @@ class DashboardStatsResponse(BaseModel):
 
 @router.get("/stats", response_model=Dict[str, Any])
 async def get_dashboard_stats(
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_report_db)
 ):
     """Get dashboard statistics with proper filtering based on user role."""
 
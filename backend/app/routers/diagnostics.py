@@ -0,0 +1,87 @@
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from app.database import pool_status
+from app.models.enums import UserRoles
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
+from app.services.replica_router import replica_router
+from app.utils.slow_queries import slow_query_recorder
+from app.utils.loop_monitor import loop_monitor
+from app.utils.profiling import list_profiles, get_profile_path
+
+router = APIRouter()
+
+
+def _require_super_admin(current_user: Principal) -> None:
+    if not current_user.role or current_user.role.name != UserRoles.super_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only super admins can access diagnostics"
+        )
+
+
+@router.get("/slow-queries", response_model=List[dict])
+async def get_slow_queries(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Get the most recent slow SQL statements of this worker with their EXPLAIN plans."""
+    _require_super_admin(current_user)
+    return slow_query_recorder.get_recent(limit)
+
+
+@router.get("/event-loop", response_model=dict)
+async def get_event_loop_stats(
+    current_user: Annotated[Principal, Depends(get_current_principal)]
+):
+    """Get event loop lag percentiles of this worker and stacks of recent blocking calls."""
+    _require_super_admin(current_user)
+    return loop_monitor.snapshot()
+
+
+@router.get("/replica", response_model=dict)
+async def get_replica_status(
+    current_user: Annotated[Principal, Depends(get_current_principal)]
+):
+    """Get read replica health, measured lag and read-your-writes state of this worker."""
+    _require_super_admin(current_user)
+    return replica_router.snapshot()
+
+
+@router.get("/pools", response_model=dict)
+async def get_pool_status(
+    current_user: Annotated[Principal, Depends(get_current_principal)]
+):
+    """Get connection usage of the critical, interactive, batch and replica pools of this worker."""
+    _require_super_admin(current_user)
+    return pool_status()
+
+
+# Profile handlers are plain functions: FastAPI runs them in the threadpool, so reading
+# the profiles directory does not block the event loop
+@router.get("/profiles", response_model=List[dict])
+def get_profiles(
+    current_user: Annotated[Principal, Depends(get_current_principal)]
+):
+    """List stored request profiles (requests sent with "X-Profile: 1"), newest first."""
+    _require_super_admin(current_user)
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    current_user: Annotated[Principal, Depends(get_current_principal)]
+):
+    """Download a profile as folded stacks (for flamegraph.pl or speedscope)."""
+    _require_super_admin(current_user)
+    path = get_profile_path(profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
@@ -3,12 +3,12 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.distributor import Distributor
-from app.models.user import User
 from app.models.enums import DistributorStatus
 from app.schemas.distributor import DistributorCreate, DistributorUpdate, DistributorResponse
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
@@ -18,7 +18,7 @@ async def get_distributors(
     status_filter: DistributorStatus | None = Query(None, alias="status", description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of distributors."""
     query = select(Distributor)
@@ -36,7 +36,7 @@ async def get_distributors(
 @router.get("/{distributor_id}", response_model=DistributorResponse)
 async def get_distributor(
     distributor_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get distributor by ID."""
     result = await db.execute(select(Distributor).filter(Distributor.id == distributor_id))
@@ -54,7 +54,7 @@ async def get_distributor(
 @router.post("", response_model=DistributorResponse, status_code=status.HTTP_201_CREATED)
 async def create_distributor(
     distributor_data: DistributorCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new distributor."""
@@ -89,7 +89,7 @@ async def create_distributor(
 async def update_distributor(
     distributor_id: int,
     distributor_data: DistributorUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update distributor."""
@@ -116,7 +116,7 @@ async def update_distributor(
 @router.delete("/{distributor_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_distributor(
     distributor_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete distributor."""
@@ -6,10 +6,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, func
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_replica_db
 from app.models.film import Film, film_genres
 from app.models.genre import Genre
-from app.models.user import User
 from app.models.session import Session
 from app.models.hall import Hall
 from app.models.ticket import Ticket
@@ -17,7 +16,8 @@ from app.models.rental_contract import RentalContract
 from app.models.enums import TicketStatus, ContractStatus
 from app.schemas.film import FilmCreate, FilmUpdate, FilmResponse, FilmsPaginatedResponse
 from app.schemas.session import SessionResponse
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 
 async def calculate_available_seats(sessions: List[Session], db: AsyncSession):
@@ -62,7 +62,7 @@ async def get_films(
         search: str | None = Query(None, description="Search in title and original title"),
         skip: int = Query(0, ge=0),
         limit: int = Query(20, ge=1, le=100),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_replica_db)
 ):
     """Get list of films with optional filters and pagination."""
     # Build base query
@@ -128,7 +128,7 @@ async def get_films(
 @router.get("/{film_id}", response_model=FilmResponse)
 async def get_film(
     film_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_replica_db)
 ):
     """Get film by ID."""
     result = await db.execute(
@@ -150,7 +150,7 @@ async def get_film(
 @router.post("", response_model=FilmResponse, status_code=status.HTTP_201_CREATED)
 async def create_film(
     film_data: FilmCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new film."""
@@ -199,7 +199,7 @@ async def create_film(
 async def update_film(
     film_id: int,
     film_data: FilmUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update film."""
@@ -253,7 +253,7 @@ async def get_film_sessions(
     include_past: bool = Query(False, description="Include past sessions in results"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_replica_db)
 ):
     """Get sessions for a specific film."""
     # Verify film exists
@@ -302,7 +302,7 @@ async def get_film_sessions(
 @router.delete("/{film_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_film(
     film_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete film."""
@@ -325,7 +325,7 @@ async def delete_film(
 async def get_films_with_active_contracts(
     cinema_id: int,
     current_date: datetime = Query(default_factory=datetime.now, description="Date to check for active contracts"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_replica_db)
 ):
     """Get films that have active contracts with the specified cinema on the given date."""
     # Join Film, RentalContract, and check for active contracts for the cinema
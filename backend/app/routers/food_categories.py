@@ -3,13 +3,14 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.food_category import FoodCategory
-from app.models.user import User
 from app.schemas.food_category import (
     FoodCategoryCreate, FoodCategoryUpdate, FoodCategoryResponse
 )
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
+from app.services.concession_menu_cache import concession_menu_cache
 
 router = APIRouter()
 
@@ -18,7 +19,7 @@ router = APIRouter()
 async def get_food_categories(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of food categories."""
     query = select(FoodCategory).order_by(FoodCategory.display_order, FoodCategory.name)
@@ -33,7 +34,7 @@ async def get_food_categories(
 @router.get("/{category_id}", response_model=FoodCategoryResponse)
 async def get_food_category(
     category_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get food category by ID."""
     result = await db.execute(select(FoodCategory).filter(FoodCategory.id == category_id))
@@ -51,7 +52,7 @@ async def get_food_category(
 @router.post("", response_model=FoodCategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_food_category(
     category_data: FoodCategoryCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new food category. Requires authentication."""
@@ -75,6 +76,7 @@ async def create_food_category(
     db.add(new_category)
     await db.commit()
     await db.refresh(new_category)
+    concession_menu_cache.invalidate()
 
     return new_category
 
@@ -83,7 +85,7 @@ async def create_food_category(
 async def update_food_category(
     category_id: int,
     category_data: FoodCategoryUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update food category. Requires authentication."""
@@ -116,6 +118,7 @@ async def update_food_category(
 
     await db.commit()
     await db.refresh(category)
+    concession_menu_cache.invalidate()
 
     return category
 
@@ -123,7 +126,7 @@ async def update_food_category(
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_food_category(
     category_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete food category. Requires authentication."""
@@ -138,5 +141,6 @@ async def delete_food_category(
 
     await db.delete(category)
     await db.commit()
+    concession_menu_cache.invalidate()
 
     return None
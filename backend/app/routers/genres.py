@@ -3,11 +3,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.genre import Genre
-from app.models.user import User
 from app.schemas.genre import GenreCreate, GenreUpdate, GenreResponse
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
@@ -16,7 +16,7 @@ router = APIRouter()
 async def get_genres(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of all genres."""
     query = select(Genre).offset(skip).limit(limit).order_by(Genre.name)
@@ -29,7 +29,7 @@ async def get_genres(
 @router.get("/{genre_id}", response_model=GenreResponse)
 async def get_genre(
     genre_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get genre by ID."""
     result = await db.execute(select(Genre).filter(Genre.id == genre_id))
@@ -47,7 +47,7 @@ async def get_genre(
 @router.post("", response_model=GenreResponse, status_code=status.HTTP_201_CREATED)
 async def create_genre(
     genre_data: GenreCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new genre (admin only)."""
@@ -74,7 +74,7 @@ async def create_genre(
 async def update_genre(
     genre_id: int,
     genre_data: GenreUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update genre (admin only)."""
@@ -112,7 +112,7 @@ async def update_genre(
 @router.delete("/{genre_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_genre(
     genre_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete genre (admin only)."""
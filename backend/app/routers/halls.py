@@ -3,23 +3,23 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, Integer
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.hall import Hall
 from app.models.cinema import Cinema
-from app.models.user import User
 from app.schemas.hall import HallCreate, HallUpdate, HallResponse, HallWithCinemaResponse
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
 
 @router.get("/with-cinema", response_model=List[HallWithCinemaResponse])
 async def get_halls_with_cinema(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     cinema_id: int | None = Query(None, description="Filter by cinema ID"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of halls with cinema information, optionally filtered by cinema."""
 
@@ -79,11 +79,11 @@ async def get_halls_with_cinema(
 
 @router.get("", response_model=List[HallResponse])
 async def get_halls(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     cinema_id: int | None = Query(None, description="Filter by cinema ID"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of halls, optionally filtered by cinema."""
 
@@ -118,7 +118,7 @@ async def get_halls(
 @router.get("/{hall_id}", response_model=HallResponse)
 async def get_hall(
     hall_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get hall by ID."""
     result = await db.execute(select(Hall).filter(Hall.id == hall_id))
@@ -136,7 +136,7 @@ async def get_hall(
 @router.post("", response_model=HallResponse, status_code=status.HTTP_201_CREATED)
 async def create_hall(
     hall_data: HallCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new hall."""
@@ -251,7 +251,7 @@ async def create_hall(
 async def update_hall(
     hall_id: int,
     hall_data: HallUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update hall."""
@@ -309,7 +309,7 @@ async def update_hall(
 @router.delete("/{hall_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_hall(
     hall_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete hall."""
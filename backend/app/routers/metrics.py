@@ -0,0 +1,49 @@
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+
+from app.config import get_settings
+from app.utils.metrics import metrics_registry
+
+router = APIRouter()
+
+# Заголовки, которые добавляет обратный прокси: за ним client.host - адрес самого прокси
+PROXY_HEADERS = ("x-forwarded-for", "x-real-ip", "forwarded")
+
+
+def _has_metrics_token(request: Request, token: str) -> bool:
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip().encode(), token.encode())
+
+
+def _is_local_scraper(request: Request, allowed_hosts: set) -> bool:
+    if request.client is None or request.client.host not in allowed_hosts:
+        return False
+    # Запрос, прошедший через прокси на том же хосте, выглядит локальным - такие отклоняем
+    return not any(header in request.headers for header in PROXY_HEADERS)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """
+    Expose in-process metrics in Prometheus text format.
+
+    Served to direct (not proxied) connections from METRICS_ALLOWED_HOSTS, or to any
+    scraper presenting METRICS_TOKEN as a bearer token.
+    """
+    settings = get_settings()
+    allowed_hosts = {host.strip() for host in settings.METRICS_ALLOWED_HOSTS.split(",") if host.strip()}
+
+    allowed = _is_local_scraper(request, allowed_hosts) or (
+        bool(settings.METRICS_TOKEN) and _has_metrics_token(request, settings.METRICS_TOKEN)
+    )
+    if not settings.METRICS_ENABLED or not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+
+    return Response(
+        content=metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -8,8 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_db, get_read_db, get_replica_db
 from app.models.order import Order
 from app.models.payment import Payment
 from app.models.ticket import Ticket
@@ -22,8 +21,10 @@ from app.models.enums import (
     TicketStatus, BonusTransactionType
 )
 from app.schemas.order import PaymentCreate, PaymentResponse, PaymentResponsePublic
-from app.routers.auth import get_current_active_user
-from app.utils.qr_generator import generate_qr_code
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
+from app.utils.qr_generator import order_qr_payload, order_qr_image_url
+from app.services.prep_queue import mark_prep_queue_changed
 
 from app.models.concession_preorder import ConcessionPreorder
 
@@ -34,7 +35,7 @@ router = APIRouter()
 async def process_payment(
     order_id: int,
     payment_data: PaymentCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Process payment for an order."""
@@ -168,6 +169,8 @@ async def process_payment(
         logger.info("Setting payment and order statuses to paid")
         new_payment.status = PaymentStatus.PAID
         order.status = OrderStatus.paid
+        # Concession preorders of a paid order enter the bar's prep queue
+        mark_prep_queue_changed(db)
 
         # Update ticket statuses and generate single order QR code for all tickets and concessions
         logger.info("Fetching tickets for order")
@@ -181,10 +184,9 @@ async def process_payment(
             logger.info(f"Updating ticket {ticket.id} status to PAID")
             ticket.status = TicketStatus.PAID
 
-        # Generate single QR code for the entire order (tickets + concessions)
-        logger.info("Generating QR code")
-        qr_data = f"ORDER-{order.id}-{transaction_id}"
-        order.qr_code = generate_qr_code(qr_data)
+        # The order QR payload is set at booking; the image is rendered on demand
+        if not order.qr_code:
+            order.qr_code = order_qr_payload(order.id)
 
         # At this point, the order should already have its discount_amount properly calculated
         # including any bonus points that were used during booking creation (deductions)
@@ -246,8 +248,8 @@ async def process_payment(
 @router.get("/{order_id}/status", response_model=PaymentResponse)
 async def get_payment_status(
     order_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get payment status for an order."""
     # Get payment status (use first() with ordering to handle potential duplicates)
@@ -279,8 +281,8 @@ async def get_payment_status(
 @router.get("/{order_id}/details", response_model=dict)
 async def get_payment_details(
     order_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get payment details for an order."""
     result = await db.execute(
@@ -343,6 +345,7 @@ async def get_payment_details(
         "final_amount": float(order.final_amount),
         "created_at": order.created_at.isoformat() if order.created_at else None,
         "qr_code": order.qr_code,
+        "qr_code_url": order_qr_image_url(order.id, order.qr_code),
         "qr_data": qr_data,
         "tickets": [
             {
@@ -398,10 +401,10 @@ async def get_payment_details(
 
 @router.get("/history", response_model=List[PaymentResponsePublic])
 async def get_payment_history(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     skip: int = 0,
     limit: int = 20,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_replica_db)
 ):
     """Get payment history for current user."""
     statement = (
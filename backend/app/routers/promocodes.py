@@ -6,16 +6,17 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.promocode import Promocode
-from app.models.user import User
 from app.models.enums import PromocodeStatus, DiscountType
 from app.schemas.promocode import (
     PromocodeCreate, PromocodeUpdate, PromocodeResponse,
     PromocodeValidateRequest, PromocodeValidation
 )
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 from app.services.promocode_service import validate_promocode
+from app.services.promocode_cache import promocode_cache
 
 router = APIRouter()
 
@@ -62,8 +63,8 @@ async def get_promocodes(
     discount_type_filter: Optional[DiscountType] = Query(None, alias="discount_type", description="Filter by discount type"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    current_user: Annotated[User, Depends(get_current_active_user)] = None,
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get list of all promocodes with optional filters (requires admin authentication).
@@ -106,8 +107,8 @@ async def get_promocodes(
 @router.get("/{promocode_id}", response_model=PromocodeResponse)
 async def get_promocode(
     promocode_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a single promocode by ID (requires admin authentication)."""
     result = await db.execute(
@@ -127,7 +128,7 @@ async def get_promocode(
 @router.post("", response_model=PromocodeResponse, status_code=status.HTTP_201_CREATED)
 async def create_promocode(
     promocode_data: PromocodeCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new promocode (requires admin authentication)."""
@@ -161,6 +162,7 @@ async def create_promocode(
     db.add(new_promocode)
     await db.commit()
     await db.refresh(new_promocode)
+    promocode_cache.invalidate()
 
     return new_promocode
 
@@ -169,7 +171,7 @@ async def create_promocode(
 async def update_promocode(
     promocode_id: int,
     promocode_data: PromocodeUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update a promocode (requires admin authentication)."""
@@ -191,6 +193,7 @@ async def update_promocode(
 
     await db.commit()
     await db.refresh(promocode)
+    promocode_cache.invalidate()
 
     return promocode
 
@@ -198,7 +201,7 @@ async def update_promocode(
 @router.delete("/{promocode_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_promocode(
     promocode_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a promocode (requires admin authentication)."""
@@ -215,5 +218,6 @@ async def delete_promocode(
 
     await db.delete(promocode)
     await db.commit()
+    promocode_cache.invalidate()
 
     return None
@@ -1,12 +1,12 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, and_, or_
 from sqlalchemy.orm import selectinload
 import re
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_db, get_read_db
 from app.models.ticket import Ticket
 from app.models.concession_preorder import ConcessionPreorder
 from app.models.order import Order
@@ -14,12 +14,22 @@ from app.models.session import Session
 from app.models.enums import UserRoles, TicketStatus, PreorderStatus, OrderStatus
 from app.schemas.order import OrderWithTicketsAndPayment
 from app.schemas.ticket import TicketResponse
-from app.routers.auth import get_current_active_user
-from pydantic import BaseModel
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
+from pydantic import BaseModel, Field
+from app.config import settings
+from app.services.check_in_service import (
+    check_in_tickets, complete_orders, CHECK_IN_USED, CHECK_IN_ALREADY_USED, CHECK_IN_NOT_FOUND
+)
+from app.services.gate_manifest import build_gate_manifest
 from app.utils.qr_generator import parse_qr_data
+from app.utils.qr_token import QrTokenClaims, is_qr_token, verify_qr_token
+from app.services.prep_queue import mark_prep_queue_changed
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 
 def parse_qr_code_string(qr_code_string: str):
     """
@@ -30,7 +40,18 @@ def parse_qr_code_string(qr_code_string: str):
     - CONCESSION:preorder_id:order_id
     - ORDER:order_id
     - ORDER-order_id-TXN-timestamp-hexcode (from payments)
+    - CQ1.payload.signature (signed order token, see utils/qr_token.py)
     """
+    if is_qr_token(qr_code_string):
+        claims = verify_qr_token(qr_code_string)
+        if claims is None:
+            return None
+        return {
+            "type": "order",
+            "order_id": claims.order_id,
+            "token": claims
+        }
+
     # First, try the existing parser for standard formats
     parsed = parse_qr_data(qr_code_string)
     if parsed:
@@ -60,12 +81,230 @@ def parse_qr_code_string(qr_code_string: str):
 
 class QRScanRequest(BaseModel):
     qr_code: str
+    # Gate bound to one session admits only tickets of that session
+    session_id: Optional[int] = None
+
+
+def token_rejection(qr_code: str) -> Optional[dict]:
+    """Reject a signed QR token in memory: bad signature or outside its entry window."""
+    claims = verify_qr_token(qr_code)
+    if claims is None:
+        return {
+            "is_valid": False,
+            "status": "invalid_signature",
+            "message": "QR-код поддельный или повреждён, проход запрещен"
+        }
+
+    window = claims.window_status()
+    if window != "valid":
+        return {
+            "is_valid": False,
+            "status": window,
+            "order": {"id": claims.order_id},
+            "message": (
+                f"Вход откроется в {claims.not_before.strftime('%H:%M')}"
+                if window == "not_yet_valid" else "Срок действия QR-кода истёк"
+            )
+        }
+    return None
+
+
+class OfflineCheckIn(BaseModel):
+    ticket_id: int
+
+
+class GateSyncRequest(BaseModel):
+    cinema_id: int
+    device_id: Optional[str] = None
+    check_ins: List[OfflineCheckIn] = Field(..., min_length=1)
+
+
+class BatchCheckInRequest(BaseModel):
+    order_id: Optional[int] = None
+    ticket_ids: Optional[List[int]] = Field(default=None, min_length=1)
+    # Turnstile of a hall admits only tickets of its session
+    session_id: Optional[int] = None
+    cinema_id: Optional[int] = None
+
+
+def require_gate_access(current_user: Principal, cinema_id: int) -> None:
+    """Gate endpoints are for staff; cinema admins and staff see only their own cinema."""
+    if current_user.role.name not in [UserRoles.admin, UserRoles.super_admin, UserRoles.staff]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and staff can use the gate API"
+        )
+    if (
+        current_user.role.name != UserRoles.super_admin
+        and current_user.cinema_id is not None
+        and current_user.cinema_id != cinema_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access to another cinema's gate data is denied"
+        )
+
+
+@router.get("/manifest")
+async def get_gate_manifest(
+    cinema_id: int,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    window: int = Query(default=settings.GATE_MANIFEST_WINDOW_HOURS, ge=1, le=settings.GATE_MANIFEST_MAX_WINDOW_HOURS),
+    since: Optional[int] = Query(default=None, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Snapshot of valid tickets and orders for sessions running now or starting within `window` hours.
+
+    Pass the returned `version` as `since` to get only tickets changed after it (including
+    ones that became cancelled or used), so tablets can validate entry while offline.
+    """
+    require_gate_access(current_user, cinema_id)
+    return await build_gate_manifest(db, cinema_id, window, since)
+
+
+@router.post("/sync")
+async def sync_offline_check_ins(
+    request_data: GateSyncRequest,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply check-ins recorded offline by a gate tablet in one conditional update.
+
+    Orders whose tickets are all used and preorders all picked up become completed,
+    as with online scans; their states are returned in `orders`.
+    """
+    require_gate_access(current_user, request_data.cinema_id)
+    if len(request_data.check_ins) > settings.GATE_SYNC_MAX_CHECK_INS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.GATE_SYNC_MAX_CHECK_INS} check-ins per sync"
+        )
+
+    check_ins = await check_in_tickets(
+        db,
+        ticket_ids=[check_in.ticket_id for check_in in request_data.check_ins],
+        cinema_id=request_data.cinema_id
+    )
+    # Заказы, в которых все билеты прошли вход, завершаются так же, как при онлайн-сканировании
+    completions = await complete_orders(
+        db, {check_in.order_id for check_in in check_ins if check_in.result == CHECK_IN_USED}
+    )
+    await db.commit()
+
+    results = {check_in.ticket_id: check_in.result for check_in in check_ins}
+
+    # Билет, уже использованный на другом входе, - возможный повторный проход
+    duplicates = [
+        check_in.ticket_id for check_in in check_ins if check_in.result == CHECK_IN_ALREADY_USED
+    ]
+    if duplicates:
+        logger.warning(
+            "Gate sync from device %s: %d ticket(s) were already used: %s",
+            request_data.device_id, len(duplicates), duplicates
+        )
+
+    return {
+        "applied": sum(1 for check_in in check_ins if check_in.result == CHECK_IN_USED),
+        "results": [
+            {
+                "ticket_id": check_in.ticket_id,
+                "result": results.get(check_in.ticket_id, CHECK_IN_NOT_FOUND),
+            }
+            for check_in in request_data.check_ins
+        ],
+        "orders": [
+            {
+                "order_id": completion.order_id,
+                "status": completion.status.value,
+                "tickets_remaining": completion.tickets_remaining,
+                "preorders_pending": completion.preorders_pending,
+                "is_completed": completion.is_completed,
+            }
+            for completion in completions
+        ],
+    }
+
+
+@router.post("/check-in")
+async def batch_check_in(
+    request_data: BatchCheckInRequest,
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Mark all paid tickets of an order (or a list of tickets) as used in one statement.
+
+    Returns the result for every ticket and the completion state of the affected orders.
+    Paid orders whose tickets are all used and preorders all picked up become completed.
+    """
+    if request_data.order_id is None and not request_data.ticket_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="order_id or ticket_ids is required"
+        )
+
+    cinema_id = request_data.cinema_id
+    if cinema_id is None and current_user.role.name != UserRoles.super_admin:
+        cinema_id = current_user.cinema_id
+    if cinema_id is not None:
+        require_gate_access(current_user, cinema_id)
+    elif current_user.role.name not in [UserRoles.admin, UserRoles.super_admin, UserRoles.staff]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and staff can check in tickets"
+        )
+
+    check_ins = await check_in_tickets(
+        db,
+        ticket_ids=request_data.ticket_ids,
+        order_id=request_data.order_id,
+        session_id=request_data.session_id,
+        cinema_id=cinema_id
+    )
+    if not check_ins:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No tickets found for check-in"
+        )
+
+    completions = await complete_orders(db, [check_in.order_id for check_in in check_ins])
+    await db.commit()
+
+    results = {check_in.ticket_id: check_in.result for check_in in check_ins}
+    return {
+        "used": sum(1 for check_in in check_ins if check_in.result == CHECK_IN_USED),
+        "tickets": [
+            {
+                "ticket_id": check_in.ticket_id,
+                "order_id": check_in.order_id,
+                "session_id": check_in.session_id,
+                "seat_id": check_in.seat_id,
+                "result": check_in.result,
+            }
+            for check_in in check_ins
+        ],
+        "not_found": [
+            ticket_id for ticket_id in request_data.ticket_ids or [] if ticket_id not in results
+        ],
+        "orders": [
+            {
+                "order_id": completion.order_id,
+                "status": completion.status.value,
+                "tickets_remaining": completion.tickets_remaining,
+                "preorders_pending": completion.preorders_pending,
+                "is_completed": completion.is_completed,
+            }
+            for completion in completions
+        ],
+    }
 
 
 @router.post("/ticket/validate")
 async def validate_ticket_qr(
     request_data: QRScanRequest,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Validate a ticket QR code for cinema entry."""
@@ -83,6 +322,12 @@ async def validate_ticket_qr(
             detail=f"Only admins and staff can scan QR codes. You are {current_user.role.name}"
         )
 
+    # Signed tokens that are forged or outside their window are rejected without the DB
+    if is_qr_token(qr_code):
+        rejection = token_rejection(qr_code)
+        if rejection:
+            return rejection
+
     # Parse the QR code to understand what type it is
     parsed_qr = parse_qr_code_string(qr_code)
 
@@ -167,7 +412,7 @@ async def validate_ticket_qr(
 @router.post("/concession/validate")
 async def validate_concession_qr(
     request_data: QRScanRequest,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Validate a concession preorder QR code for pickup."""
@@ -292,7 +537,7 @@ async def validate_concession_qr(
 @router.post("/scan")  # Kept for backward compatibility
 async def scan_qr_code(
     request_data: QRScanRequest,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Handle QR code scanning for tickets or concession items (legacy endpoint)."""
@@ -310,6 +555,13 @@ async def scan_qr_code(
             detail="Only admins and staff can scan QR codes"
         )
 
+    # Signed order token: verified in memory, the DB is touched only by the mark-used write
+    if is_qr_token(qr_code):
+        rejection = token_rejection(qr_code)
+        if rejection:
+            return {"type": "ticket", **rejection}
+        return await handle_token_scan(verify_qr_token(qr_code), request_data.session_id, db)
+
     # First, try to find if the QR code belongs to a ticket
     ticket_result = await db.execute(
         select(Ticket)
@@ -410,6 +662,69 @@ async def handle_ticket_scan(ticket: Ticket, db: AsyncSession):
         }
 
 
+async def handle_token_scan(claims: QrTokenClaims, session_id: Optional[int], db: AsyncSession):
+    """Admit the tickets of a verified QR token with a single conditional UPDATE."""
+    session_ids = [session_id] if session_id is not None else claims.session_ids
+    seat_conditions = [
+        and_(Ticket.session_id == sid, Ticket.seat_id.in_(claims.seat_ids_for(sid)))
+        for sid in session_ids
+        if claims.seat_ids_for(sid)
+    ]
+    if not seat_conditions:
+        return {
+            "type": "ticket",
+            "is_valid": False,
+            "status": "wrong_session",
+            "order": {"id": claims.order_id},
+            "message": "Tickets of this order are for another session"
+        }
+
+    # Only paid tickets are admitted: used, cancelled and unpaid ones are left untouched
+    result = await db.execute(
+        update(Ticket)
+        .where(
+            Ticket.order_id == claims.order_id,
+            Ticket.status == TicketStatus.PAID,
+            or_(*seat_conditions)
+        )
+        .values(status=TicketStatus.USED)
+        .returning(Ticket.id, Ticket.session_id, Ticket.seat_id)
+        .execution_options(synchronize_session=False)
+    )
+    admitted = result.all()
+
+    if not admitted:
+        await db.commit()
+        return {
+            "type": "ticket",
+            "is_valid": False,
+            "status": "not_admitted",
+            "order": {"id": claims.order_id},
+            "message": "Tickets already used, refunded or not paid"
+        }
+
+    # Same order state as /check-in: a fully used and collected order becomes completed
+    completion = (await complete_orders(db, [claims.order_id]))[0]
+    await db.commit()
+
+    return {
+        "type": "ticket",
+        "is_valid": True,
+        "status": "used",
+        "order": {
+            "id": claims.order_id,
+            "status": completion.status.value,
+            "tickets_remaining": completion.tickets_remaining,
+            "preorders_pending": completion.preorders_pending,
+        },
+        "tickets": [
+            {"id": row.id, "session_id": row.session_id, "seat_id": row.seat_id}
+            for row in admitted
+        ],
+        "message": f"{len(admitted)} ticket(s) successfully used"
+    }
+
+
 async def handle_concession_scan(preorder: ConcessionPreorder, db: AsyncSession):
     """Handle scanning of a concession preorder QR code."""
     # Check if the concession item is already marked as completed
@@ -451,16 +766,15 @@ async def handle_concession_scan(preorder: ConcessionPreorder, db: AsyncSession)
 
     # Mark the concession item as completed
     preorder.status = PreorderStatus.COMPLETED
-    await db.commit()
-    await db.refresh(preorder)
+    mark_prep_queue_changed(db)
+    await db.flush()
 
-    # Check if all concession items in the order are now completed
-    all_preorders_result = await db.execute(
-        select(ConcessionPreorder).filter(ConcessionPreorder.order_id == preorder.order_id)
-    )
-    all_preorders = all_preorders_result.scalars().all()
+    # Order completion (no pending preorders and unused tickets) is computed in the same transaction
+    completion = (await complete_orders(db, [preorder.order_id]))[0]
+    all_completed = completion.preorders_pending == 0
 
-    all_completed = all(p.status == PreorderStatus.COMPLETED for p in all_preorders)
+    await db.commit()
+    await db.refresh(preorder)
 
     return {
         "type": "concession",
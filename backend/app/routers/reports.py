@@ -5,11 +5,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_batch_db, get_report_db
 from app.models.user import User
 from app.models.report import Report
 from app.models.enums import ReportType, ReportStatus, ReportFormat
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
@@ -23,8 +24,8 @@ async def get_reports(
     period_start: date | None = Query(None),
     period_end: date | None = Query(None),
     search: str | None = Query(None, description="Search by user email"),
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_report_db)
 ):
     """Get list of reports with filters."""
     # Only admin users should be able to see reports
@@ -79,8 +80,8 @@ async def get_reports(
 @router.get("/{report_id}", response_model=dict)
 async def get_report(
     report_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_report_db)
 ):
     """Get report by ID."""
     if not current_user.role or current_user.role.name not in ["admin", "super_admin"]:
@@ -117,8 +118,8 @@ async def get_report(
 @router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_report(
     report_data: dict,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_batch_db)
 ):
     """Create a new report request."""
     if not current_user.role or current_user.role.name not in ["admin", "super_admin"]:
@@ -173,8 +174,8 @@ async def create_report(
 @router.post("/{report_id}/generate", response_model=dict)
 async def generate_report(
     report_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_batch_db)
 ):
     """Generate report with given ID."""
     if not current_user.role or current_user.role.name not in [ "admin", "super_admin"]:
@@ -210,8 +211,8 @@ async def generate_report(
 @router.delete("/{report_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_report(
     report_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_batch_db)
 ):
     """Delete report by ID."""
     if not current_user.role or current_user.role.name not in [ "admin", "super_admin"]:
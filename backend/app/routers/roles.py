@@ -4,10 +4,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.role import Role
 from app.models.user import User
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal, principal_cache
 
 router = APIRouter()
 
@@ -17,8 +18,8 @@ async def get_roles(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: str | None = Query(None, description="Search by role name"),
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of roles with pagination and search."""
     # Only admin users should be able to see roles
@@ -44,8 +45,8 @@ async def get_roles(
 @router.get("/{role_id}", response_model=dict)
 async def get_role(
     role_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get role by ID."""
     if not current_user.role or current_user.role.name not in [ "admin", "super_admin"]:
@@ -69,7 +70,7 @@ async def get_role(
 @router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_role(
     role_data: dict,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new role."""
@@ -101,7 +102,7 @@ async def create_role(
 async def update_role(
     role_id: int,
     role_data: dict,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Update role by ID."""
@@ -136,6 +137,7 @@ async def update_role(
     role.name = role_data["name"]
     await db.commit()
     await db.refresh(role)
+    principal_cache.invalidate_role(role_id)
 
     return {"id": role.id, "name": role.name}
 
@@ -143,7 +145,7 @@ async def update_role(
 @router.delete("/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_role(
     role_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete role by ID."""
@@ -4,12 +4,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.seat import Seat
 from app.models.hall import Hall
 from app.schemas.seat import SeatCreate, SeatUpdate, SeatResponse
-from app.routers.auth import get_current_active_user
-from app.models.user import User
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 from app.schemas.seat import SeatWithCinemaResponse
 
@@ -24,8 +24,8 @@ async def get_seats(
     hall_id: int | None = Query(None, description="Filter by hall ID"),
     row_number: int | None = Query(None, description="Filter by row number"),
     is_aisle: bool | None = Query(None, description="Filter by aisle status"),
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of seats with optional filters."""
     # Only admin/users with appropriate permissions should access seat management
@@ -64,8 +64,8 @@ async def get_seats_with_cinema(
     hall_id: int | None = Query(None, description="Filter by hall ID"),
     row_number: int | None = Query(None, description="Filter by row number"),
     is_aisle: bool | None = Query(None, description="Filter by aisle status"),
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of seats with cinema and hall information."""
     # Only admin/users with appropriate permissions should access seat management
@@ -117,8 +117,8 @@ async def get_seats_with_cinema(
 @router.get("/{seat_id}", response_model=SeatResponse)
 async def get_seat(
     seat_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get seat by ID."""
     if not current_user.role or current_user.role.name not in ["admin", "super_admin"]:
@@ -143,8 +143,8 @@ async def get_seat(
 @router.get("/{seat_id}/with-cinema", response_model=SeatWithCinemaResponse)
 async def get_seat_with_cinema(
     seat_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get seat by ID with cinema and hall information."""
     if not current_user.role or current_user.role.name not in ["admin", "super_admin"]:
@@ -182,7 +182,7 @@ async def get_seat_with_cinema(
 @router.post("", response_model=SeatResponse, status_code=status.HTTP_201_CREATED)
 async def create_seat(
     seat_data: SeatCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new seat."""
@@ -237,7 +237,7 @@ async def create_seat(
 async def update_seat(
         seat_id: int,
         seat_data: SeatUpdate,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_principal),
         db: AsyncSession = Depends(get_db)
 ):
     """Update seat by ID."""
@@ -313,7 +313,7 @@ async def update_seat(
 @router.delete("/{seat_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_seat(
     seat_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete seat by ID."""
@@ -6,19 +6,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.session import Session
 from app.models.film import Film
 from app.models.hall import Hall
 from app.models.cinema import Cinema
 from app.models.seat import Seat
 from app.models.ticket import Ticket
-from app.models.user import User
 from app.models.rental_contract import RentalContract
 from app.models.enums import SessionStatus, TicketStatus
 from app.schemas.session import SessionCreate, SessionUpdate, SessionResponse, SessionWithSeats
 from app.schemas.seat import SeatWithStatus
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
@@ -64,7 +64,7 @@ async def get_sessions(
     include_past: bool = Query(False, description="Include past sessions in results"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of sessions with optional filters."""
     query = select(Session).options(
@@ -127,7 +127,7 @@ async def get_sessions(
 @router.get("/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get session by ID."""
     result = await db.execute(
@@ -157,7 +157,7 @@ async def get_session(
 @router.get("/{session_id}/seats", response_model=SessionWithSeats)
 async def get_session_seats(
     session_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get session with seat availability."""
     # Get session
@@ -233,7 +233,7 @@ async def get_session_seats(
 @router.post("", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
 async def create_session(
     session_data: SessionCreate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new session with conflict checking and permission validation."""
@@ -368,7 +368,7 @@ async def create_session(
 async def update_session(
     session_id: int,
     session_data: SessionUpdate,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Update session (limited fields)."""
@@ -502,7 +502,7 @@ async def update_session(
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
     session_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Delete session."""
@@ -4,8 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_db, get_read_db
 from app.models.ticket import Ticket
 from app.models.session import Session
 from app.models.film import Film
@@ -16,7 +15,8 @@ from app.models.enums import TicketStatus
 from app.models.order import Order
 from pydantic import BaseModel
 from app.schemas.ticket import TicketResponse
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal
 
 from app.models.enums import UserRoles
 router = APIRouter()
@@ -24,11 +24,11 @@ router = APIRouter()
 
 @router.get("/my", response_model=List[TicketResponse])
 async def get_my_tickets(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     status_filter: TicketStatus | None = Query(None, alias="status", description="Filter by ticket status"),
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(10, ge=1, le=100, description="Maximum number of records to return"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all tickets for current user with pagination and optional status filter."""
     query = select(Ticket).options(
@@ -54,9 +54,9 @@ async def get_my_tickets(
 
 @router.get("/my/count", response_model=int)
 async def get_my_tickets_count(
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     status_filter: TicketStatus | None = Query(None, alias="status", description="Filter by ticket status"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get total count of tickets for current user with optional status filter."""
     query = select(func.count(Ticket.id)).filter(Ticket.buyer_id == current_user.id)
@@ -73,8 +73,8 @@ async def get_my_tickets_count(
 @router.get("/{ticket_id}", response_model=TicketResponse)
 async def get_ticket(
     ticket_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
-    db: AsyncSession = Depends(get_db)
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific ticket by ID."""
     result = await db.execute(
@@ -110,7 +110,7 @@ class ValidateTicketRequest(BaseModel):
 @router.post("/validate")
 async def validate_ticket(
     request_data: ValidateTicketRequest,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Validate a ticket by QR code - for admin/controller use."""
@@ -165,7 +165,7 @@ async def validate_ticket(
 @router.post("/{ticket_id}/use")
 async def mark_ticket_as_used(
     ticket_id: int,
-    current_user: Annotated[User, Depends(get_current_active_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     db: AsyncSession = Depends(get_db)
 ):
     """Mark a ticket as used - for admin/controller use."""
@@ -8,12 +8,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, asc
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.models.bonus_account import BonusAccount
 from app.models.enums import UserStatus
 from app.schemas.user import UserResponse, UserCreate, UserUpdate
-from app.routers.auth import get_current_active_user
+from app.routers.auth import get_current_principal
+from app.services.principal_cache import Principal, principal_cache
 from app.models.role import Role
 
 from app.schemas.user import UserCreateInAdmin
@@ -28,8 +29,8 @@ async def get_users(
     status_filter: UserStatus | None = Query(None, alias="status"),
     cinema_id: int | None = Query(None, description="Filter by cinema ID for super admin users"),
     search: str | None = Query(None, description="Search by email, first_name, or last_name"),
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get list of users with pagination and filters."""
     # Only admin users should be able to see all users
@@ -99,8 +100,8 @@ async def get_users(
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user by ID."""
     if not current_user.role or current_user.role.name not in ["admin", "super_admin"]:
@@ -146,7 +147,7 @@ async def get_user(
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Update user by ID."""
@@ -177,6 +178,9 @@ async def update_user(
     await db.commit()
     await db.refresh(user)
 
+    # Role, status or cinema may have changed - drop the cached principal
+    principal_cache.invalidate_user(user.id)
+
     # Add bonus balance to the user data
     bonus_account = await db.execute(
         select(BonusAccount).filter(BonusAccount.user_id == user.id)
@@ -200,7 +204,7 @@ async def update_user(
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete user by ID."""
@@ -221,6 +225,7 @@ async def delete_user(
 
     await db.delete(user)
     await db.commit()
+    principal_cache.invalidate_user(user_id)
 
     return None
 
@@ -228,8 +233,8 @@ async def delete_user(
 @router.get("/{user_id}/bonus-balance", response_model=float)
 async def get_user_bonus_balance(
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user's bonus account balance."""
     if not current_user.role or current_user.role.name not in ["admin", "super_admin"]:
@@ -257,7 +262,7 @@ async def get_user_bonus_balance(
 @router.post("", response_model=UserResponse)
 async def create_user(
     user_create: UserCreateInAdmin,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -287,9 +292,9 @@ async def create_user(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Role with id {user_create.role_id} does not exist"
             )
-    from app.utils.security import verify_password, get_password_hash
+    from app.utils.security import get_password_hash_async
     # Подготовка данных для создания пользователя
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
 
     if user_create.cinema_id==None and user_create.role.name=="super_admin":
         user_create.cinema_id=0
@@ -13,7 +13,8 @@ from .ticket import TicketBase, TicketCreate, TicketResponse, TicketValidation
 from .order import OrderBase, OrderCreate, OrderResponse, OrderWithTickets, PaymentCreate, PaymentResponse
 from .concession import (
     ConcessionItemBase, ConcessionItemCreate, ConcessionItemUpdate, ConcessionItemResponse,
-    ConcessionPreorderCreate, ConcessionPreorderResponse
+    ConcessionMenuItemResponse, ConcessionPreorderCreate, ConcessionPreorderResponse,
+    PrepQueueItem, PrepQueueSession, PrepQueueResponse
 )
 from .promocode import PromocodeBase, PromocodeCreate, PromocodeUpdate, PromocodeResponse, PromocodeValidation
 
@@ -41,7 +42,8 @@ __all__ = [
     "OrderBase", "OrderCreate", "OrderResponse", "OrderWithTickets", "PaymentCreate", "PaymentResponse",
     # Concession schemas
     "ConcessionItemBase", "ConcessionItemCreate", "ConcessionItemUpdate", "ConcessionItemResponse",
-    "ConcessionPreorderCreate", "ConcessionPreorderResponse",
+    "ConcessionMenuItemResponse", "ConcessionPreorderCreate", "ConcessionPreorderResponse",
+    "PrepQueueItem", "PrepQueueSession", "PrepQueueResponse",
     # Promocode schemas
     "PromocodeBase", "PromocodeCreate", "PromocodeUpdate", "PromocodeResponse", "PromocodeValidation",
 ]
@@ -1,8 +1,9 @@
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 from decimal import Decimal
 from pydantic import BaseModel, Field, ConfigDict
 
-from app.models.enums import ConcessionItemStatus
+from app.models.enums import ConcessionItemStatus, ConcessionStockLevel
 from app.schemas.food_category import FoodCategoryResponse
 
 
@@ -48,6 +49,18 @@ class ConcessionItemResponse(ConcessionItemBase):
     status: ConcessionItemStatus
 
 
+# Schema for public menu item response (stock shown as a coarse level to keep the menu cacheable)
+class ConcessionMenuItemResponse(ConcessionItemBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    cinema_id: int
+    category_id: int
+    category: Optional[FoodCategoryResponse] = None
+    stock_level: ConcessionStockLevel
+    status: ConcessionItemStatus
+
+
 # Schema for creating a concession preorder when order already exists
 class ConcessionPreorderCreate(BaseModel):
     order_id: int = Field(..., gt=0)
@@ -76,3 +89,28 @@ class ConcessionPreorderResponse(BaseModel):
     total_price: Decimal
     pickup_code: Optional[str] = None
     status: str
+
+
+# Schema for one item line of the concession prep queue
+class PrepQueueItem(BaseModel):
+    concession_item_id: int
+    name: str
+    quantity: int
+    orders_count: int
+
+
+# Schema for the prep queue of one upcoming session
+class PrepQueueSession(BaseModel):
+    session_id: int
+    start_datetime: datetime
+    film_title: str
+    hall_name: Optional[str] = None
+    items: List[PrepQueueItem]
+
+
+# Schema for the concession prep queue response
+class PrepQueueResponse(BaseModel):
+    cinema_id: int
+    window_minutes: int
+    generated_at: datetime
+    sessions: List[PrepQueueSession]
@@ -1,9 +1,10 @@
 from datetime import datetime
 from typing import Optional, List
 from decimal import Decimal
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, computed_field
 
 from app.models.enums import OrderStatus
+from app.utils.qr_generator import order_qr_image_url
 from .ticket import TicketCreate, TicketResponse
 from .concession import ConcessionPreorderCreate, ConcessionPreorderCreateForOrder, ConcessionPreorderResponse, ConcessionItemResponse
 
@@ -35,8 +36,14 @@ class OrderResponse(OrderBase):
     created_at: datetime
     expires_at: datetime
     status: OrderStatus
+    # Compact QR payload (ORDER:{id}); the image is served by qr_code_url
     qr_code: Optional[str] = None
 
+    @computed_field
+    @property
+    def qr_code_url(self) -> Optional[str]:
+        return order_qr_image_url(self.id, self.qr_code)
+
 
 # Public payment response schema for order display
 class PaymentResponsePublic(BaseModel):
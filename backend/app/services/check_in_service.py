@@ -0,0 +1,170 @@
+"""
+Check-in service - Отметка билетов использованными на входе в зал.
+
+Этот сервис обрабатывает:
+- Отметку билетов заказа или списка билетов одним условным UPDATE ... RETURNING
+  (только оплаченные билеты)
+- Причину отказа по каждому неотмеченному билету одним дополнительным SELECT
+- Завершённость заказов (не осталось оплаченных билетов и невыданных предзаказов)
+  и перевод оплаченных заказов в completed в той же транзакции
+
+Условие status = PAID в самом UPDATE гарантирует, что два турникета (или офлайн-планшет
+и онлайн-сканер) не пропустят один билет дважды без блокировок.
+"""
+
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.concession_preorder import ConcessionPreorder
+from app.models.enums import OrderStatus, PreorderStatus, TicketStatus
+from app.models.hall import Hall
+from app.models.order import Order
+from app.models.session import Session
+from app.models.ticket import Ticket
+
+# Результаты отметки билета
+CHECK_IN_USED = "used"
+CHECK_IN_ALREADY_USED = "already_used"
+CHECK_IN_NOT_PAID = "not_paid"
+CHECK_IN_NOT_FOUND = "not_found"
+
+# Предзаказы, которые ещё должны быть выданы
+PENDING_PREORDER_STATUSES = [PreorderStatus.PENDING, PreorderStatus.READY]
+
+
+class TicketCheckIn:
+    """Результат отметки одного билета."""
+
+    __slots__ = ("ticket_id", "order_id", "session_id", "seat_id", "result")
+
+    def __init__(self, ticket_id: int, order_id: int, session_id: int, seat_id: int, result: str):
+        self.ticket_id = ticket_id
+        self.order_id = order_id
+        self.session_id = session_id
+        self.seat_id = seat_id
+        self.result = result
+
+
+class OrderCompletion:
+    """Состояние заказа после отметки билетов."""
+
+    __slots__ = ("order_id", "status", "tickets_remaining", "preorders_pending")
+
+    def __init__(self, order_id: int, status: OrderStatus, tickets_remaining: int, preorders_pending: int):
+        self.order_id = order_id
+        self.status = status
+        # Оплаченные билеты, по которым ещё не было прохода
+        self.tickets_remaining = tickets_remaining
+        # Предзаказы кинобара в статусах PENDING / READY
+        self.preorders_pending = preorders_pending
+
+    @property
+    def is_completed(self) -> bool:
+        return self.tickets_remaining == 0 and self.preorders_pending == 0
+
+
+def _cinema_sessions(cinema_id: int):
+    return select(Session.id).join(Hall, Hall.id == Session.hall_id).where(Hall.cinema_id == cinema_id)
+
+
+async def check_in_tickets(
+    db: AsyncSession,
+    ticket_ids: Optional[Iterable[int]] = None,
+    order_id: Optional[int] = None,
+    session_id: Optional[int] = None,
+    cinema_id: Optional[int] = None
+) -> List[TicketCheckIn]:
+    """
+    Отметить использованными билеты из списка ticket_ids и/или все билеты заказа order_id.
+
+    session_id и cinema_id сужают набор до билетов сеанса / кинотеатра (турникет зала).
+    Возвращает результат по каждому найденному билету; коммит выполняет вызывающий код.
+    """
+    conditions = []
+    if ticket_ids is not None:
+        conditions.append(Ticket.id.in_(sorted(set(ticket_ids))))
+    if order_id is not None:
+        conditions.append(Ticket.order_id == order_id)
+    if not conditions:
+        return []
+    if session_id is not None:
+        conditions.append(Ticket.session_id == session_id)
+    if cinema_id is not None:
+        conditions.append(Ticket.session_id.in_(_cinema_sessions(cinema_id)))
+
+    result = await db.execute(
+        update(Ticket)
+        .where(*conditions, Ticket.status == TicketStatus.PAID)
+        .values(status=TicketStatus.USED)
+        .returning(Ticket.id, Ticket.order_id, Ticket.session_id, Ticket.seat_id)
+        .execution_options(synchronize_session=False)
+    )
+    check_ins = {
+        row.id: TicketCheckIn(row.id, row.order_id, row.session_id, row.seat_id, CHECK_IN_USED)
+        for row in result.all()
+    }
+
+    # Остальные билеты набора не были оплаченными - выясняем почему
+    used_ids = [Ticket.id.notin_(list(check_ins))] if check_ins else []
+    rejected = await db.execute(
+        select(Ticket.id, Ticket.order_id, Ticket.session_id, Ticket.seat_id, Ticket.status)
+        .where(*conditions, *used_ids)
+    )
+    for row in rejected.all():
+        check_ins[row.id] = TicketCheckIn(
+            row.id, row.order_id, row.session_id, row.seat_id,
+            CHECK_IN_ALREADY_USED if row.status == TicketStatus.USED else CHECK_IN_NOT_PAID
+        )
+
+    return sorted(check_ins.values(), key=lambda check_in: check_in.ticket_id)
+
+
+async def complete_orders(db: AsyncSession, order_ids: Iterable[int]) -> List[OrderCompletion]:
+    """
+    Подсчитать оставшиеся билеты и предзаказы заказов одним запросом.
+
+    Оплаченные заказы, по которым всё использовано и выдано, переводятся в completed
+    в текущей транзакции. Коммит выполняет вызывающий код.
+    """
+    order_ids = sorted(set(order_ids))
+    if not order_ids:
+        return []
+
+    tickets_remaining = (
+        select(func.count(Ticket.id))
+        .where(Ticket.order_id == Order.id, Ticket.status == TicketStatus.PAID)
+        .scalar_subquery()
+    )
+    preorders_pending = (
+        select(func.count(ConcessionPreorder.id))
+        .where(ConcessionPreorder.order_id == Order.id, ConcessionPreorder.status.in_(PENDING_PREORDER_STATUSES))
+        .scalar_subquery()
+    )
+    rows = (await db.execute(
+        select(Order.id, Order.status, tickets_remaining.label("tickets_remaining"),
+               preorders_pending.label("preorders_pending"))
+        .where(Order.id.in_(order_ids))
+    )).all()
+    completions = [
+        OrderCompletion(row.id, row.status, row.tickets_remaining, row.preorders_pending)
+        for row in rows
+    ]
+
+    completed_ids = [
+        completion.order_id for completion in completions
+        if completion.is_completed and completion.status == OrderStatus.paid
+    ]
+    if completed_ids:
+        await db.execute(
+            update(Order)
+            .where(Order.id.in_(completed_ids), Order.status == OrderStatus.paid)
+            .values(status=OrderStatus.completed)
+            .execution_options(synchronize_session=False)
+        )
+        for completion in completions:
+            if completion.order_id in completed_ids:
+                completion.status = OrderStatus.completed
+
+    return completions
@@ -0,0 +1,156 @@
+"""
+Concession menu cache - Кэш публичного меню кинобара по кинотеатрам.
+
+Этот модуль обрабатывает:
+- Снимок меню кинотеатра, построенный одним запросом и хранимый в памяти процесса
+- Грубые уровни остатка (IN_STOCK / LOW_STOCK / OUT_OF_STOCK) вместо точного количества
+- Готовые JSON-ответы и ETag для последних CONCESSION_MENU_RENDERED_PAGES вариантов фильтра и пагинации
+- Инвалидацию при записи в concessions.py / food_categories.py и при пересечении порога остатка
+
+Изменения остатков накапливаются в db.info и применяются только после коммита транзакции,
+чтобы откатанное резервирование не сбрасывало кэш.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession, selectinload
+
+from app.config import settings
+from app.models.concession_item import ConcessionItem
+from app.models.enums import ConcessionItemStatus, ConcessionStockLevel
+from app.schemas.concession import ConcessionItemResponse, ConcessionMenuItemResponse
+
+_PENDING_STOCK_KEY = "concession_menu_pending_stock"
+
+
+def stock_level(stock_quantity: int) -> ConcessionStockLevel:
+    """Перевести точный остаток в грубый уровень для публичного меню."""
+    if stock_quantity <= 0:
+        return ConcessionStockLevel.OUT_OF_STOCK
+    if stock_quantity <= settings.CONCESSION_LOW_STOCK_THRESHOLD:
+        return ConcessionStockLevel.LOW_STOCK
+    return ConcessionStockLevel.IN_STOCK
+
+
+class MenuSnapshot:
+    """Снимок меню одного кинотеатра."""
+
+    def __init__(self, cinema_id: int, items: List[dict], levels: Dict[int, ConcessionStockLevel]):
+        self.cinema_id = cinema_id
+        # Все позиции кинотеатра, отсортированные по названию, в JSON-совместимом виде
+        self.items = items
+        # Уровень остатка по id позиции - для отслеживания пересечения порогов
+        self.levels = levels
+        self.built_at = time.monotonic()
+        # Готовые (тело ответа, ETag) по ключу (статус, skip, limit); LRU, чтобы произвольные
+        # skip/limit клиентов не раздували память до истечения TTL
+        self._rendered: "OrderedDict[Tuple[str, int, int], Tuple[bytes, str]]" = OrderedDict()
+
+    def render(self, status_filter: ConcessionItemStatus, skip: int, limit: int) -> Tuple[bytes, str]:
+        key = (status_filter.value, skip, limit)
+        rendered = self._rendered.get(key)
+        if rendered is not None:
+            self._rendered.move_to_end(key)
+            return rendered
+
+        page = [item for item in self.items if item["status"] == status_filter.value][skip:skip + limit]
+        body = json.dumps(page, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        rendered = (body, etag)
+        self._rendered[key] = rendered
+        if len(self._rendered) > settings.CONCESSION_MENU_RENDERED_PAGES:
+            self._rendered.popitem(last=False)
+        return rendered
+
+
+class ConcessionMenuCache:
+    """Кэш снимков меню по cinema_id с перестроением по TTL."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._snapshots: Dict[int, MenuSnapshot] = {}
+        # Обратный индекс: id позиции -> cinema_id, для инвалидации по изменению остатка
+        self._item_cinemas: Dict[int, int] = {}
+
+    def _is_fresh(self, snapshot: MenuSnapshot) -> bool:
+        return time.monotonic() - snapshot.built_at < self.ttl_seconds
+
+    async def get(self, db: AsyncSession, cinema_id: int) -> MenuSnapshot:
+        snapshot = self._snapshots.get(cinema_id)
+        if snapshot is not None and self._is_fresh(snapshot):
+            return snapshot
+
+        result = await db.execute(
+            select(ConcessionItem)
+            .options(selectinload(ConcessionItem.category))
+            .filter(ConcessionItem.cinema_id == cinema_id)
+            .order_by(ConcessionItem.name.asc())
+        )
+        items = result.scalars().all()
+
+        menu_items = []
+        levels = {}
+        for item in items:
+            level = stock_level(item.stock_quantity)
+            levels[item.id] = level
+            item_data = ConcessionItemResponse.model_validate(item).model_dump(exclude={"stock_quantity"})
+            menu_items.append(
+                ConcessionMenuItemResponse(**item_data, stock_level=level).model_dump(mode="json")
+            )
+
+        snapshot = MenuSnapshot(cinema_id, menu_items, levels)
+        self._snapshots[cinema_id] = snapshot
+        for item_id in levels:
+            self._item_cinemas[item_id] = cinema_id
+
+        return snapshot
+
+    def invalidate(self, cinema_id: Optional[int] = None) -> None:
+        """Сбросить снимок кинотеатра или, без аргумента, все снимки."""
+        if cinema_id is None:
+            self._snapshots.clear()
+            self._item_cinemas.clear()
+            return
+
+        snapshot = self._snapshots.pop(cinema_id, None)
+        if snapshot is not None:
+            for item_id in snapshot.levels:
+                self._item_cinemas.pop(item_id, None)
+
+    def apply_stock(self, stock: Dict[int, int]) -> None:
+        """Сбросить снимки, в которых остаток позиции пересёк порог уровня."""
+        for item_id, stock_quantity in stock.items():
+            cinema_id = self._item_cinemas.get(item_id)
+            if cinema_id is None:
+                continue
+
+            snapshot = self._snapshots.get(cinema_id)
+            if snapshot is not None and snapshot.levels.get(item_id) != stock_level(stock_quantity):
+                self.invalidate(cinema_id)
+
+
+concession_menu_cache = ConcessionMenuCache(ttl_seconds=settings.CONCESSION_MENU_CACHE_TTL_SECONDS)
+
+
+def record_stock_change(db: AsyncSession, stock: Dict[int, int]) -> None:
+    """Запомнить новые остатки позиций - они применятся к кэшу после коммита."""
+    if stock:
+        db.info.setdefault(_PENDING_STOCK_KEY, {}).update(stock)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _apply_pending_stock(session: OrmSession) -> None:
+    pending = session.info.pop(_PENDING_STOCK_KEY, None)
+    if pending:
+        concession_menu_cache.apply_stock(pending)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_pending_stock(session: OrmSession) -> None:
+    session.info.pop(_PENDING_STOCK_KEY, None)
@@ -0,0 +1,160 @@
+"""
+Concession stock service - Атомарные операции со складом кинобара.
+
+Этот сервис обрабатывает:
+- Резервирование всех позиций корзины одним условным UPDATE ... FROM (VALUES ...)
+- Возврат на склад позиций отменённых заказов одним агрегированным UPDATE
+
+Проверка остатка выполняется в самом UPDATE (stock_quantity >= quantity), поэтому
+два конкурентных покупателя последней позиции не могут оба пройти без блокировок.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, values, column, Integer
+
+from app.models.concession_item import ConcessionItem
+from app.models.concession_preorder import ConcessionPreorder
+from app.models.enums import PreorderStatus
+from app.services.concession_menu_cache import record_stock_change
+from app.services.prep_queue import mark_prep_queue_changed
+
+
+class StockReservationResult:
+    """Результат резервирования позиций кинобара."""
+
+    def __init__(
+        self,
+        is_reserved: bool,
+        remaining: Dict[int, int],
+        failed_item_ids: List[int],
+        available: Dict[int, int]
+    ):
+        self.is_reserved = is_reserved
+        # Остаток после резервирования по успешно зарезервированным позициям
+        self.remaining = remaining
+        # Позиции, для которых не хватило остатка (или которых не существует)
+        self.failed_item_ids = failed_item_ids
+        # Текущий остаток по позициям из failed_item_ids (для сообщений об ошибке)
+        self.available = available
+
+
+def aggregate_quantities(line_items: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+    """Сложить количества одинаковых позиций корзины."""
+    quantities: Dict[int, int] = {}
+    for item_id, quantity in line_items:
+        quantities[item_id] = quantities.get(item_id, 0) + quantity
+    return quantities
+
+
+def _quantities_values(quantities: Dict[int, int], name: str):
+    # Сортировка по id даёт одинаковый порядок блокировки строк у конкурентных корзин
+    return values(
+        column("item_id", Integer),
+        column("quantity", Integer),
+        name=name
+    ).data(sorted(quantities.items()))
+
+
+async def reserve_items(db: AsyncSession, quantities: Dict[int, int]) -> StockReservationResult:
+    """
+    Зарезервировать все позиции корзины одним запросом.
+
+    Если хотя бы одна позиция не зарезервирована, часть остатков уже списана в текущей
+    транзакции - вызывающий код должен откатить транзакцию (HTTPException в роутере
+    приводит к rollback в get_db).
+    """
+    if not quantities:
+        return StockReservationResult(is_reserved=True, remaining={}, failed_item_ids=[], available={})
+
+    requested = _quantities_values(quantities, "requested")
+    result = await db.execute(
+        update(ConcessionItem)
+        .where(
+            ConcessionItem.id == requested.c.item_id,
+            ConcessionItem.stock_quantity >= requested.c.quantity
+        )
+        .values(stock_quantity=ConcessionItem.stock_quantity - requested.c.quantity)
+        .returning(ConcessionItem.id, ConcessionItem.stock_quantity)
+        .execution_options(synchronize_session=False)
+    )
+    remaining = {row.id: row.stock_quantity for row in result.all()}
+    record_stock_change(db, remaining)
+
+    failed_item_ids = [item_id for item_id in quantities if item_id not in remaining]
+    if not failed_item_ids:
+        return StockReservationResult(is_reserved=True, remaining=remaining, failed_item_ids=[], available={})
+
+    # Неуспешный путь: один запрос за текущими остатками для сообщения пользователю
+    available_result = await db.execute(
+        select(ConcessionItem.id, ConcessionItem.stock_quantity)
+        .filter(ConcessionItem.id.in_(failed_item_ids))
+    )
+    available = {row.id: row.stock_quantity for row in available_result.all()}
+
+    return StockReservationResult(
+        is_reserved=False,
+        remaining=remaining,
+        failed_item_ids=failed_item_ids,
+        available=available
+    )
+
+
+async def restock_items(db: AsyncSession, quantities: Dict[int, int]) -> Dict[int, int]:
+    """Вернуть на склад указанные количества одним запросом. Возвращает новые остатки."""
+    if not quantities:
+        return {}
+
+    returned = _quantities_values(quantities, "returned")
+    result = await db.execute(
+        update(ConcessionItem)
+        .where(ConcessionItem.id == returned.c.item_id)
+        .values(stock_quantity=ConcessionItem.stock_quantity + returned.c.quantity)
+        .returning(ConcessionItem.id, ConcessionItem.stock_quantity)
+        .execution_options(synchronize_session=False)
+    )
+    stock = {row.id: row.stock_quantity for row in result.all()}
+    record_stock_change(db, stock)
+    return stock
+
+
+async def release_order_preorders(db: AsyncSession, order_ids: List[int]) -> Dict[int, int]:
+    """
+    Отменить предзаказы заказов и вернуть их позиции на склад одним запросом.
+
+    Предзаказы, уже находящиеся в статусе CANCELLED, повторно на склад не возвращаются.
+    Возвращает новые остатки затронутых позиций.
+    """
+    if not order_ids:
+        return {}
+
+    cancelled = (
+        update(ConcessionPreorder)
+        .where(
+            ConcessionPreorder.order_id.in_(order_ids),
+            ConcessionPreorder.status != PreorderStatus.CANCELLED
+        )
+        .values(status=PreorderStatus.CANCELLED)
+        .returning(ConcessionPreorder.concession_item_id, ConcessionPreorder.quantity)
+        .cte("cancelled_preorders")
+    )
+    released = (
+        select(
+            cancelled.c.concession_item_id.label("item_id"),
+            func.sum(cancelled.c.quantity).label("quantity")
+        )
+        .group_by(cancelled.c.concession_item_id)
+        .subquery("released")
+    )
+    result = await db.execute(
+        update(ConcessionItem)
+        .where(ConcessionItem.id == released.c.item_id)
+        .values(stock_quantity=ConcessionItem.stock_quantity + released.c.quantity)
+        .returning(ConcessionItem.id, ConcessionItem.stock_quantity)
+        .execution_options(synchronize_session=False)
+    )
+    stock = {row.id: row.stock_quantity for row in result.all()}
+    record_stock_change(db, stock)
+    if stock:
+        mark_prep_queue_changed(db)
+    return stock
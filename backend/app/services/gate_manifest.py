@@ -0,0 +1,122 @@
+"""
+Gate manifest - Снимок действующих билетов кинотеатра для офлайн-проверки на входе.
+
+Этот модуль обрабатывает:
+- Сборку манифеста одним запросом: билеты + места + заказы + сеансы + фильмы на сеансы,
+  которые идут сейчас или начнутся в ближайшие window часов
+- Версию манифеста (время последнего изменения билета, мс) и дельту по версии:
+  планшет передаёт since и получает только билеты, изменённые после неё
+
+Заказ в манифесте представлен хешем его QR-payload: планшет хеширует отсканированную
+строку и ищет заказ, не зная ключа подписи QR-токенов. Дельта берётся с перекрытием
+GATE_MANIFEST_VERSION_OVERLAP_SECONDS, чтобы не терять изменения транзакций, которые
+закоммитились позже более новых - повторно полученные билеты планшет просто перезаписывает.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import pytz
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.enums import TicketStatus
+from app.models.film import Film
+from app.models.hall import Hall
+from app.models.order import Order
+from app.models.seat import Seat
+from app.models.session import Session
+from app.models.ticket import Ticket
+
+# Порядок полей в компактных строках билетов манифеста
+MANIFEST_TICKET_FIELDS = ["id", "order_id", "session_id", "seat_id", "row_number", "seat_number", "status"]
+# В полном манифесте только билеты, по которым возможен (или уже был) проход
+MANIFEST_TICKET_STATUSES = [TicketStatus.PAID, TicketStatus.USED]
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def manifest_version(value: datetime) -> int:
+    """Версия манифеста: наивное московское время изменения в миллисекундах."""
+    return int((value - _EPOCH).total_seconds() * 1000)
+
+
+def qr_lookup_hash(qr_code: str) -> str:
+    """Хеш QR-payload заказа, по которому планшет ищет заказ в манифесте."""
+    return hashlib.sha256(qr_code.encode("utf-8")).hexdigest()[:32]
+
+
+async def build_gate_manifest(
+    db: AsyncSession,
+    cinema_id: int,
+    window_hours: int,
+    since: Optional[int] = None
+) -> Dict[str, Any]:
+    """Собрать полный манифест (since=None) или дельту после версии since."""
+    now = datetime.now(pytz.timezone('Europe/Moscow')).replace(tzinfo=None)
+
+    query = (
+        select(
+            Ticket.id, Ticket.order_id, Ticket.session_id, Ticket.seat_id, Ticket.status, Ticket.updated_at,
+            Seat.row_number, Seat.seat_number,
+            Order.qr_code, Order.status.label("order_status"),
+            Session.hall_id, Session.start_datetime, Session.end_datetime, Film.title
+        )
+        .join(Session, Session.id == Ticket.session_id)
+        .join(Hall, Hall.id == Session.hall_id)
+        .join(Film, Film.id == Session.film_id)
+        .join(Seat, Seat.id == Ticket.seat_id)
+        .join(Order, Order.id == Ticket.order_id)
+        .filter(
+            Hall.cinema_id == cinema_id,
+            Session.end_datetime >= now,
+            Session.start_datetime <= now + timedelta(hours=window_hours)
+        )
+        .order_by(Ticket.session_id, Ticket.id)
+    )
+    if since is None:
+        query = query.filter(Ticket.status.in_(MANIFEST_TICKET_STATUSES))
+    else:
+        changed_after = _EPOCH + timedelta(milliseconds=since) - timedelta(seconds=settings.GATE_MANIFEST_VERSION_OVERLAP_SECONDS)
+        query = query.filter(Ticket.updated_at > changed_after)
+
+    rows = (await db.execute(query)).all()
+
+    sessions: Dict[int, Dict[str, Any]] = {}
+    orders: Dict[int, Dict[str, Any]] = {}
+    tickets = []
+    version = since if since is not None else manifest_version(now)
+    for row in rows:
+        if row.session_id not in sessions:
+            sessions[row.session_id] = {
+                "id": row.session_id,
+                "hall_id": row.hall_id,
+                "film_title": row.title,
+                "start_datetime": row.start_datetime,
+                "end_datetime": row.end_datetime,
+            }
+        if row.order_id not in orders:
+            orders[row.order_id] = {
+                "id": row.order_id,
+                "status": row.order_status.value,
+                "qr_hash": qr_lookup_hash(row.qr_code) if row.qr_code else None,
+            }
+        tickets.append([
+            row.id, row.order_id, row.session_id, row.seat_id, row.row_number, row.seat_number, row.status.value
+        ])
+        version = max(version, manifest_version(row.updated_at))
+
+    return {
+        "cinema_id": cinema_id,
+        "version": version,
+        "since": since,
+        "is_delta": since is not None,
+        "generated_at": now,
+        "window_hours": window_hours,
+        "sessions": list(sessions.values()),
+        "orders": list(orders.values()),
+        "ticket_fields": MANIFEST_TICKET_FIELDS,
+        "tickets": tickets,
+    }
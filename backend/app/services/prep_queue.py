@@ -0,0 +1,218 @@
+"""
+Prep queue - Очередь заготовки кинобара по ближайшим сеансам.
+
+Этот модуль обрабатывает:
+- Агрегацию количества по позициям кинобара для PENDING предзаказов оплаченных заказов
+  на сеансы, начинающиеся в заданном окне, одним сгруппированным запросом
+- Уведомление SSE-подписчиков после коммита транзакций, изменивших очередь
+  (оплата заказа, новый предзаказ, выдача, отмена)
+- Поток SSE, который отправляет только изменившиеся сеансы
+
+Предзаказ относится к первому сеансу своего заказа внутри окна.
+"""
+
+import asyncio
+import json
+import re
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+import pytz
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+from starlette.requests import Request
+
+from app.config import settings
+from app.database import ReadOnlySessionLocal
+from app.models.concession_item import ConcessionItem
+from app.models.concession_preorder import ConcessionPreorder
+from app.models.enums import OrderStatus, PreorderStatus, TicketStatus
+from app.models.film import Film
+from app.models.hall import Hall
+from app.models.order import Order
+from app.models.session import Session
+from app.models.ticket import Ticket
+from app.schemas.concession import PrepQueueItem, PrepQueueResponse, PrepQueueSession
+
+_CHANGED_KEY = "prep_queue_changed"
+_WINDOW_PATTERN = re.compile(r"^(\d+)([mh]?)$")
+
+
+def parse_window(window: str) -> timedelta:
+    """Разобрать окно вида '30m', '2h' или '45' (минуты)."""
+    match = _WINDOW_PATTERN.match(window.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid window '{window}', expected e.g. '30m' or '2h'")
+
+    amount, unit = int(match.group(1)), match.group(2)
+    minutes = amount * 60 if unit == "h" else amount
+    if minutes <= 0 or minutes > settings.PREP_QUEUE_MAX_WINDOW_MINUTES:
+        raise ValueError(f"Window must be between 1 and {settings.PREP_QUEUE_MAX_WINDOW_MINUTES} minutes")
+
+    return timedelta(minutes=minutes)
+
+
+async def get_prep_queue(
+    db: AsyncSession,
+    cinema_id: int,
+    window: timedelta,
+    now: Optional[datetime] = None
+) -> PrepQueueResponse:
+    """Собрать очередь заготовки кинотеатра одним сгруппированным запросом."""
+    if now is None:
+        now = datetime.now(pytz.timezone('Europe/Moscow')).replace(tzinfo=None)
+
+    # Заказ -> самый ранний по времени начала сеанс в окне (в заказе несколько билетов,
+    # предзаказы не должны умножаться); DISTINCT ON оставляет первую строку каждого заказа
+    order_sessions = (
+        select(Ticket.order_id, Ticket.session_id)
+        .join(Session, Ticket.session_id == Session.id)
+        .join(Hall, Session.hall_id == Hall.id)
+        .filter(
+            Hall.cinema_id == cinema_id,
+            Session.start_datetime >= now,
+            Session.start_datetime <= now + window,
+            Ticket.status != TicketStatus.CANCELLED
+        )
+        .distinct(Ticket.order_id)
+        .order_by(Ticket.order_id, Session.start_datetime.asc(), Session.id.asc())
+        .subquery("order_sessions")
+    )
+
+    result = await db.execute(
+        select(
+            Session.id.label("session_id"),
+            Session.start_datetime,
+            Film.title.label("film_title"),
+            Hall.name.label("hall_name"),
+            ConcessionItem.id.label("concession_item_id"),
+            ConcessionItem.name.label("item_name"),
+            func.sum(ConcessionPreorder.quantity).label("quantity"),
+            func.count(func.distinct(ConcessionPreorder.order_id)).label("orders_count")
+        )
+        .select_from(ConcessionPreorder)
+        .join(Order, ConcessionPreorder.order_id == Order.id)
+        .join(order_sessions, order_sessions.c.order_id == Order.id)
+        .join(Session, Session.id == order_sessions.c.session_id)
+        .join(Film, Session.film_id == Film.id)
+        .join(Hall, Session.hall_id == Hall.id)
+        .join(ConcessionItem, ConcessionPreorder.concession_item_id == ConcessionItem.id)
+        .filter(
+            ConcessionPreorder.status == PreorderStatus.PENDING,
+            Order.status == OrderStatus.paid
+        )
+        .group_by(
+            Session.id, Session.start_datetime, Film.title, Hall.name,
+            ConcessionItem.id, ConcessionItem.name
+        )
+        .order_by(Session.start_datetime.asc(), Session.id.asc(), ConcessionItem.name.asc())
+    )
+
+    sessions: Dict[int, PrepQueueSession] = {}
+    for row in result.all():
+        queue_session = sessions.get(row.session_id)
+        if queue_session is None:
+            queue_session = PrepQueueSession(
+                session_id=row.session_id,
+                start_datetime=row.start_datetime,
+                film_title=row.film_title,
+                hall_name=row.hall_name,
+                items=[]
+            )
+            sessions[row.session_id] = queue_session
+        queue_session.items.append(
+            PrepQueueItem(
+                concession_item_id=row.concession_item_id,
+                name=row.item_name,
+                quantity=row.quantity,
+                orders_count=row.orders_count
+            )
+        )
+
+    return PrepQueueResponse(
+        cinema_id=cinema_id,
+        window_minutes=int(window.total_seconds() // 60),
+        generated_at=now,
+        sessions=list(sessions.values())
+    )
+
+
+class PrepQueueNotifier:
+    """Рассылка сигнала "очередь изменилась" всем открытым SSE-потокам процесса."""
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Event] = set()
+
+    def subscribe(self) -> asyncio.Event:
+        changed = asyncio.Event()
+        self._subscribers.add(changed)
+        return changed
+
+    def unsubscribe(self, changed: asyncio.Event) -> None:
+        self._subscribers.discard(changed)
+
+    def notify(self) -> None:
+        for changed in self._subscribers:
+            changed.set()
+
+
+prep_queue_notifier = PrepQueueNotifier()
+
+
+def mark_prep_queue_changed(db: AsyncSession) -> None:
+    """Отметить, что транзакция меняет очередь заготовки - подписчики узнают после коммита."""
+    db.info[_CHANGED_KEY] = True
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _notify_prep_queue(session: OrmSession) -> None:
+    if session.info.pop(_CHANGED_KEY, False):
+        prep_queue_notifier.notify()
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _discard_prep_queue_change(session: OrmSession) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def _sse(event_name: str, data: dict) -> str:
+    return f"event: {event_name}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+async def stream_prep_queue(request: Request, cinema_id: int, window: timedelta) -> AsyncIterator[str]:
+    """
+    Поток SSE очереди заготовки.
+
+    Первым отправляется событие snapshot с полной очередью, затем только изменения:
+    session - сеанс с новым составом позиций, session_removed - сеанс ушёл из очереди.
+    Очередь пересчитывается после сигнала об изменении (с небольшой задержкой, чтобы
+    объединить пачку заказов) и периодически - сеансы сами входят в окно со временем.
+    Каждый пересчёт берёт отдельную сессию БД, чтобы поток не держал соединение из пула.
+    """
+    changed = prep_queue_notifier.subscribe()
+    sent: Optional[Dict[int, dict]] = None
+    try:
+        while not await request.is_disconnected():
+            changed.clear()
+            async with ReadOnlySessionLocal() as db:
+                queue = await get_prep_queue(db, cinema_id, window)
+
+            current = {s.session_id: s.model_dump(mode="json") for s in queue.sessions}
+            if sent is None:
+                yield _sse("snapshot", queue.model_dump(mode="json"))
+            else:
+                for session_id, payload in current.items():
+                    if sent.get(session_id) != payload:
+                        yield _sse("session", payload)
+                for session_id in sent.keys() - current.keys():
+                    yield _sse("session_removed", {"session_id": session_id})
+            sent = current
+
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=settings.PREP_QUEUE_REFRESH_SECONDS)
+                await asyncio.sleep(settings.PREP_QUEUE_DEBOUNCE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        prep_queue_notifier.unsubscribe(changed)
@@ -0,0 +1,141 @@
+"""
+Principal cache - Кэш аутентифицированных пользователей для зависимостей авторизации.
+
+Кэш хранит:
+- Лёгкий снимок пользователя (id, email, статус, роль, cinema_id) по subject токена
+- Ограниченное число записей с вытеснением давно не использованных (LRU) и TTL
+
+resolve_principal берёт снимок из кэша, а при промахе загружает его короткой собственной
+сессией БД (зависимость get_current_principal и ProfilingMiddleware).
+
+Записи сбрасываются при изменении или удалении пользователя (routers/users.py)
+и при переименовании роли (routers/roles.py). TTL ограничивает устаревание
+в остальных случаях, в том числе между несколькими процессами.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.models.enums import UserStatus
+
+
+class PrincipalRole:
+    """Снимок роли пользователя - повторяет атрибуты Role, которые читают роутеры."""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+
+
+class Principal:
+    """Неизменяемый снимок аутентифицированного пользователя, не привязанный к сессии БД."""
+
+    __slots__ = ("id", "email", "status", "role_id", "role", "cinema_id")
+
+    def __init__(
+        self,
+        id: int,
+        email: str,
+        status: UserStatus,
+        role_id: Optional[int],
+        role: Optional[PrincipalRole],
+        cinema_id: Optional[int]
+    ):
+        self.id = id
+        self.email = email
+        self.status = status
+        self.role_id = role_id
+        self.role = role
+        self.cinema_id = cinema_id
+
+
+class PrincipalCache:
+    """LRU-кэш снимков пользователей по subject токена с ограничением по TTL."""
+
+    def __init__(self, ttl_seconds: int, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+
+    def get(self, subject: str) -> Optional[Principal]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            return None
+
+        loaded_at, principal = entry
+        if time.monotonic() - loaded_at >= self.ttl_seconds:
+            del self._entries[subject]
+            return None
+
+        self._entries.move_to_end(subject)
+        return principal
+
+    def put(self, subject: str, principal: Principal) -> None:
+        self._entries[subject] = (time.monotonic(), principal)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Сбросить записи пользователя (по всем subject, под которыми он закэширован)."""
+        for subject in [s for s, (_, p) in self._entries.items() if p.id == user_id]:
+            del self._entries[subject]
+
+    def invalidate_role(self, role_id: int) -> None:
+        """Сбросить записи всех пользователей с указанной ролью."""
+        for subject in [s for s, (_, p) in self._entries.items() if p.role_id == role_id]:
+            del self._entries[subject]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE
+)
+
+
+async def resolve_principal(subject: str) -> Optional[Principal]:
+    """
+    Получить снимок пользователя по subject токена (email) из кэша или из БД.
+
+    При промахе кэша пользователь загружается короткой сессией, которая закрывается сразу
+    после запроса, - соединение не удерживается до конца обработки HTTP-запроса.
+    Возвращает None, если пользователь не найден.
+    """
+    principal = principal_cache.get(subject)
+    if principal is not None:
+        return principal
+
+    from sqlalchemy import select
+
+    from app.database import AsyncSessionLocal
+    from app.models.role import Role
+    from app.models.user import User
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User.id, User.email, User.status, User.role_id, User.cinema_id, Role.name.label("role_name"))
+            .outerjoin(Role, User.role_id == Role.id)
+            .filter(User.email == subject)
+        )
+        row = result.one_or_none()
+
+    if row is None:
+        return None
+
+    principal = Principal(
+        id=row.id,
+        email=row.email,
+        status=row.status,
+        role_id=row.role_id,
+        role=PrincipalRole(id=row.role_id, name=row.role_name) if row.role_id is not None else None,
+        cinema_id=row.cinema_id
+    )
+    principal_cache.put(subject, principal)
+    return principal
@@ -0,0 +1,150 @@
+"""
+Promocode cache - In-process индекс промокодов для validate_promocode.
+
+Кэш хранит:
+- Точное множество известных кодов, чтобы несуществующие коды отклонялись без обращения к БД
+- Снимки строк промокодов для проверки статуса, дат и лимитов использования
+
+Кэш полностью перечитывается по истечении TTL и после записи через routers/promocodes.py.
+Инкремент использования всегда выполняется в БД (см. promocode_service.increment_usage).
+"""
+
+import asyncio
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.promocode import Promocode
+from app.models.enums import PromocodeStatus, DiscountType
+
+
+class CachedPromocode:
+    """Неизменяемый снимок строки промокода, не привязанный к сессии БД."""
+
+    __slots__ = (
+        "id", "code", "discount_type", "discount_value", "valid_from", "valid_until",
+        "max_uses", "used_count", "min_order_amount", "applicable_category", "status",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        code: str,
+        discount_type: DiscountType,
+        discount_value: Decimal,
+        valid_from: date,
+        valid_until: date,
+        max_uses: Optional[int],
+        used_count: int,
+        min_order_amount: Optional[Decimal],
+        applicable_category: Optional[str],
+        status: PromocodeStatus
+    ):
+        self.id = id
+        self.code = code
+        self.discount_type = discount_type
+        self.discount_value = discount_value
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+        self.max_uses = max_uses
+        self.used_count = used_count
+        self.min_order_amount = min_order_amount
+        self.applicable_category = applicable_category
+        self.status = status
+
+    @classmethod
+    def from_model(cls, promocode: Promocode) -> "CachedPromocode":
+        return cls(
+            id=promocode.id,
+            code=promocode.code,
+            discount_type=promocode.discount_type,
+            discount_value=promocode.discount_value,
+            valid_from=promocode.valid_from,
+            valid_until=promocode.valid_until,
+            max_uses=promocode.max_uses,
+            used_count=promocode.used_count,
+            min_order_amount=promocode.min_order_amount,
+            applicable_category=promocode.applicable_category,
+            status=promocode.status
+        )
+
+
+class PromocodeCache:
+    """Индекс промокодов в памяти процесса с перезагрузкой по TTL."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._known_codes: Set[str] = set()
+        self._rows: Dict[str, CachedPromocode] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def normalize(code: str) -> str:
+        return code.strip().upper()
+
+    def is_stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at >= self.ttl_seconds
+
+    async def reload(self, db: AsyncSession) -> None:
+        """Перечитать все промокоды одним запросом."""
+        result = await db.execute(select(Promocode))
+        rows = {p.code.upper(): CachedPromocode.from_model(p) for p in result.scalars().all()}
+
+        self._rows = rows
+        self._known_codes = set(rows.keys())
+        self._loaded_at = time.monotonic()
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        if not self.is_stale():
+            return
+
+        async with self._lock:
+            # Другая корутина могла уже перезагрузить кэш, пока мы ждали блокировку
+            if self.is_stale():
+                await self.reload(db)
+
+    async def get(self, db: AsyncSession, code: str) -> Optional[CachedPromocode]:
+        """
+        Найти промокод по коду.
+
+        Неизвестные коды отклоняются без запроса к БД. Если строка известного кода
+        была сброшена после инкремента использования, она перечитывается одним запросом.
+        """
+        await self.ensure_fresh(db)
+
+        normalized = self.normalize(code)
+        if normalized not in self._known_codes:
+            return None
+
+        cached = self._rows.get(normalized)
+        if cached is not None:
+            return cached
+
+        result = await db.execute(select(Promocode).filter(Promocode.code == normalized))
+        promocode = result.scalar_one_or_none()
+        if promocode is None:
+            self._known_codes.discard(normalized)
+            return None
+
+        cached = CachedPromocode.from_model(promocode)
+        self._rows[normalized] = cached
+        return cached
+
+    def discard(self, code: str) -> None:
+        """Сбросить снимок строки, оставив код в множестве известных."""
+        self._rows.pop(self.normalize(code), None)
+
+    def invalidate(self) -> None:
+        """Пометить весь кэш устаревшим - следующий запрос перечитает таблицу."""
+        self._loaded_at = None
+
+
+promocode_cache = PromocodeCache(ttl_seconds=settings.PROMOCODE_CACHE_TTL_SECONDS)
@@ -10,12 +10,13 @@ Promocode service - Бизнес-логика для валидации и ис
 import pytz
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, or_, case
 
 from app.models.promocode import Promocode
 from app.models.enums import PromocodeStatus, DiscountType
+from app.services.promocode_cache import promocode_cache, CachedPromocode
 import pytz
 
 class PromocodeValidationResult:
@@ -26,7 +27,7 @@ class PromocodeValidationResult:
         is_valid: bool,
         discount_amount: Decimal = Decimal("0.00"),
         message: str = "",
-        promocode: Optional[Promocode] = None
+        promocode: Optional[Union[Promocode, CachedPromocode]] = None
     ):
         self.is_valid = is_valid
         self.discount_amount = discount_amount
@@ -60,11 +61,8 @@ async def validate_promocode(
     if today is None:
         today = datetime.now(pytz.timezone('Europe/Moscow')).date()
 
-    # Найти промокод по коду
-    result = await db.execute(
-        select(Promocode).filter(Promocode.code == code.strip().upper())
-    )
-    promocode = result.scalar_one_or_none()
+    # Найти промокод по коду в кэше (неизвестные коды отклоняются без запроса к БД)
+    promocode = await promocode_cache.get(db, code)
 
     if not promocode:
         return PromocodeValidationResult(
@@ -176,7 +174,7 @@ async def validate_promocode(
     )
 
 
-def calculate_discount(promocode: Promocode, order_amount: Decimal) -> Decimal:
+def calculate_discount(promocode: Union[Promocode, CachedPromocode], order_amount: Decimal) -> Decimal:
     if order_amount <= 0:
         return Decimal("0.00")
 
@@ -198,18 +196,41 @@ def calculate_discount(promocode: Promocode, order_amount: Decimal) -> Decimal:
     return min(discount_amount, order_amount)
 
 
-async def increment_usage(db: AsyncSession, promocode: Promocode) -> None:
+async def increment_usage(db: AsyncSession, promocode: Union[Promocode, CachedPromocode]) -> bool:
+    """
+    Атомарно увеличить счётчик использования промокода.
+
+    Возвращает False, если лимит использования уже исчерпан конкурентными заказами.
+    """
     if not promocode:
-        return
+        return False
+
+    # Инкремент и перевод в DEPLETED одним условным UPDATE, чтобы не превысить max_uses
+    result = await db.execute(
+        update(Promocode)
+        .where(
+            Promocode.id == promocode.id,
+            or_(Promocode.max_uses.is_(None), Promocode.used_count < Promocode.max_uses)
+        )
+        .values(
+            used_count=Promocode.used_count + 1,
+            status=case(
+                (
+                    Promocode.max_uses.isnot(None) & (Promocode.used_count + 1 >= Promocode.max_uses),
+                    PromocodeStatus.DEPLETED
+                ),
+                else_=Promocode.status
+            )
+        )
+        .returning(Promocode.id)
+        .execution_options(synchronize_session=False)
+    )
+    incremented = result.scalar_one_or_none() is not None
 
-    # Увеличить счётчик использования
-    promocode.used_count += 1
+    # Снимок в кэше больше не актуален - при следующей проверке строка будет перечитана
+    promocode_cache.discard(promocode.code)
 
-    # Проверить, достигнут ли лимит использования
-    if promocode.max_uses is not None:
-        if promocode.used_count >= promocode.max_uses:
-            # Отметить как исчерпанный
-            promocode.status = PromocodeStatus.DEPLETED
+    return incremented
 
 
 async def check_and_update_expired_promocodes(db: AsyncSession, today: Optional[date] = None) -> int:
@@ -234,6 +255,7 @@ async def check_and_update_expired_promocodes(db: AsyncSession, today: Optional[
 
     if count > 0:
         await db.commit()
+        promocode_cache.invalidate()
 
     return count
 
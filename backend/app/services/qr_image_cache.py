@@ -0,0 +1,65 @@
+"""
+QR image cache - Отрисовка QR-кодов заказов по запросу с кэшем по хешу содержимого.
+
+В заказе хранится только компактный payload (ORDER:{id}), а картинка строится при первом
+запросе GET /bookings/{id}/qr.png|svg:
+- Отрисовка (qrcode + Pillow) выполняется в отдельном пуле потоков, а не в event loop
+- Готовые картинки хранятся в LRU-кэше по ключу (формат, sha256 payload)
+- Одновременные запросы одной и той же картинки ждут одну отрисовку
+"""
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple
+
+from app.config import settings
+from app.utils.qr_generator import qr_payload_hash, render_qr_image
+
+_render_executor = ThreadPoolExecutor(
+    max_workers=settings.QR_RENDER_WORKERS,
+    thread_name_prefix="qr-render"
+)
+
+
+class QrImageCache:
+    """LRU-кэш отрисованных QR-кодов, адресуемый хешем payload."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._images: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def get_image(self, payload: str, image_format: str) -> Tuple[bytes, str]:
+        """Картинка QR-кода и её ETag (хеш payload)."""
+        digest = qr_payload_hash(payload)
+        key = (image_format, digest)
+
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            return image, digest
+
+        # Уже отрисовывается по другому запросу - ждём тот же результат
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending), digest
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_render_executor, render_qr_image, payload, image_format)
+        self._pending[key] = future
+        try:
+            image = await asyncio.shield(future)
+        finally:
+            self._pending.pop(key, None)
+
+        self._images[key] = image
+        while len(self._images) > self.max_size:
+            self._images.popitem(last=False)
+        return image, digest
+
+    def clear(self) -> None:
+        self._images.clear()
+
+
+qr_image_cache = QrImageCache(max_size=settings.QR_IMAGE_CACHE_MAX_SIZE)
@@ -0,0 +1,175 @@
+"""
+Replica router - Выбор между репликой и основной БД для тяжёлых чтений.
+
+Этот модуль обрабатывает:
+- Фоновую проверку отставания реплики (раз в REPLICA_LAG_CHECK_INTERVAL_SECONDS)
+- Отказ от реплики, пока она недоступна или отстаёт больше REPLICA_MAX_LAG_SECONDS
+- Read-your-writes: после изменяющего запроса пользователя его чтения ещё
+  READ_YOUR_WRITES_SECONDS идут в основную БД (например, история заказов сразу после брони).
+  Окно открывает utils/read_your_writes.ReadYourWritesMiddleware до отправки ответа: в памяти
+  процесса (по subject токена) и в cookie read_primary_until с моментом окончания окна, чтобы
+  окно соблюдалось и при нескольких процессах uvicorn
+
+Маршрутизация объявляется в роутерах зависимостями database.get_replica_db (каталог фильмов,
+история заказов) и database.get_report_db (дашборд, выплаты по договорам, отчёты). Остальные
+чтения (схема зала, проверка билетов, манифест турникетов) всегда идут в основную БД через
+get_read_db.
+
+Локальная проверка на двух экземплярах PostgreSQL: DATABASE_REPLICA_URL указывает на второй
+экземпляр (streaming-реплику или копию базы). Экземпляр не в режиме восстановления
+считается репликой без отставания, поэтому подойдёт и просто восстановленный дамп.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Cookie с unix-временем окончания окна read-your-writes клиента
+READ_YOUR_WRITES_COOKIE = "read_primary_until"
+
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+replica_lag_seconds = metrics_registry.gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of the read replica measured by the lag guard"
+)
+read_routing_total = metrics_registry.counter(
+    "db_read_routing_total",
+    "Replica-eligible reads by target database and routing reason",
+    ("target", "reason")
+)
+
+
+class ReplicaRouter:
+    """Состояние реплики и окна read-your-writes пользователей."""
+
+    def __init__(self, max_lag: float, check_interval: float, read_your_writes: float, max_users: int):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.read_your_writes = read_your_writes
+        self.max_users = max_users
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.last_error: Optional[str] = None
+        self._engine: Optional[AsyncEngine] = None
+        self._task: Optional[asyncio.Task] = None
+        # subject токена -> момент (monotonic), до которого его чтения идут в основную БД
+        self._primary_until: "OrderedDict[str, float]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._engine is not None
+
+    def start(self, engine: Optional[AsyncEngine]) -> None:
+        """Запустить проверку отставания реплики (без реплики маршрутизация выключена)."""
+        if engine is None or self._task is not None:
+            return
+        self._engine = engine
+        self._task = asyncio.create_task(self._run(), name="replica-lag-guard")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._engine = None
+        self.healthy = False
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(self.check_interval)
+
+    async def check_lag(self) -> None:
+        try:
+            async with self._engine.connect() as conn:
+                self.lag = float((await conn.execute(REPLICA_LAG_QUERY)).scalar_one())
+        except Exception as exc:
+            if self.healthy or self.last_error is None:
+                logger.warning("Read replica is unavailable, reads go to the primary: %s", exc)
+            self.healthy = False
+            self.lag = None
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            return
+
+        if not self.healthy and self.last_error is not None:
+            logger.info("Read replica is available again (lag %.2fs)", self.lag)
+        self.healthy = True
+        self.last_error = None
+        replica_lag_seconds.set((), self.lag)
+
+    def record_write(self, subject: Optional[str]) -> None:
+        """Направить чтения пользователя в основную БД на время окна read-your-writes."""
+        if not self.enabled or subject is None:
+            return
+        self._primary_until[subject] = time.monotonic() + self.read_your_writes
+        self._primary_until.move_to_end(subject)
+        while len(self._primary_until) > self.max_users:
+            self._primary_until.popitem(last=False)
+
+    def route(self, subject: Optional[str], primary_until: Optional[float] = None) -> str:
+        """
+        Причина выбора: "replica" или причина чтения из основной БД.
+
+        primary_until - unix-время окончания окна read-your-writes из cookie клиента
+        (окно могло быть открыто другим процессом).
+        """
+        if not self.enabled:
+            return "no_replica"
+        if not self.healthy:
+            return "replica_unavailable"
+        if self.lag is None or self.lag > self.max_lag:
+            return "replica_lagging"
+        if primary_until is not None and primary_until > time.time():
+            return "read_your_writes"
+        if subject is not None:
+            primary_until = self._primary_until.get(subject)
+            if primary_until is not None:
+                if primary_until > time.monotonic():
+                    return "read_your_writes"
+                del self._primary_until[subject]
+        return "replica"
+
+    def use_replica(self, subject: Optional[str], primary_until: Optional[float] = None) -> bool:
+        reason = self.route(subject, primary_until)
+        target = "replica" if reason == "replica" else "primary"
+        read_routing_total.inc((target, reason))
+        return target == "replica"
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "last_error": self.last_error,
+            "read_your_writes_seconds": self.read_your_writes,
+            "users_pinned_to_primary": sum(1 for until in self._primary_until.values() if until > time.monotonic()),
+        }
+
+
+replica_router = ReplicaRouter(
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+    read_your_writes=settings.READ_YOUR_WRITES_SECONDS,
+    max_users=settings.READ_YOUR_WRITES_MAX_USERS
+)
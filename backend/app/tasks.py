@@ -1,9 +1,8 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import select, update, and_
-from sqlalchemy.sql import func
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 import logging
@@ -13,9 +12,7 @@ from logging.handlers import RotatingFileHandler
 from app.config import settings
 from app.models.order import Order
 from app.models.ticket import Ticket
-from app.models.concession_preorder import ConcessionPreorder
-from app.models.enums import OrderStatus, TicketStatus, PreorderStatus, SessionStatus, PaymentStatus
-from app.database import engine, get_db
+from app.models.enums import OrderStatus, TicketStatus, SessionStatus, PaymentStatus
 from app.models.bonus_account import BonusAccount
 from app.models.bonus_transaction import BonusTransaction
 from app.models.enums import BonusTransactionType
@@ -24,7 +21,7 @@ from app.models.payment_history import PaymentHistory
 from app.models.rental_contract import RentalContract
 from app.models.film import Film
 from app.models.enums import SessionStatus, ContractStatus
-import pytz
+from app.services.concession_stock_service import release_order_preorders
 
 logger = logging.getLogger(__name__)
 
@@ -57,9 +54,9 @@ contract_calculations_logger.propagate = False # Prevent duplicate logs
 
 class OrderCleanupService:
     def __init__(self, db_url: str = None):
-        # Use the shared engine from database.py if available
-        from app.database import engine as shared_engine
-        self.engine = shared_engine
+        # Background jobs run on the batch pool so they never take connections from ticket sales
+        from app.database import batch_engine
+        self.engine = batch_engine
         self.SessionLocal = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
         self.scheduler = AsyncIOScheduler()
 
@@ -73,88 +70,77 @@ class OrderCleanupService:
                 # Find orders that are pending payment and have exceeded expiration time
                 current_time = datetime.now(pytz.timezone('Europe/Moscow')).replace(tzinfo=None)
 
-                expired_orders_result = await db.execute(
-                    select(Order).filter(
+                # Cancel the expired orders in one guarded statement: an order paid after the
+                # deadline passed is no longer created/pending_payment and is left untouched
+                cancelled_orders_result = await db.execute(
+                    update(Order)
+                    .where(
                         Order.status.in_([OrderStatus.created, OrderStatus.pending_payment]),
                         Order.expires_at < current_time
                     )
+                    .values(status=OrderStatus.cancelled)  # For OrderStatus, names remain lowercase as per requirement
+                    .returning(Order.id)
+                    .execution_options(synchronize_session=False)
+                )
+                expired_order_ids = cancelled_orders_result.scalars().all()
+                if not expired_order_ids:
+                    return
+
+                logger.info(f"Cancelling expired orders: {expired_order_ids}")
+
+                # Only the orders cancelled above release their tickets, preorders and bonuses
+                await db.execute(
+                    update(Ticket)
+                    .where(Ticket.order_id.in_(expired_order_ids))
+                    .values(status=TicketStatus.CANCELLED)
+                    .execution_options(synchronize_session=False)
                 )
-                expired_orders = expired_orders_result.scalars().all()
-
-                for order in expired_orders:
-                    logger.info(f"Cancelling expired order: {order.id}")
-
-                    # Update order status to cancelled
-                    order.status = OrderStatus.cancelled  # For OrderStatus, names remain lowercase as per requirement
-                    await db.commit()
 
-                    # Update tickets status to cancelled
-                    await db.execute(
-                        update(Ticket)
-                        .where(Ticket.order_id == order.id)
-                        .values(status=TicketStatus.CANCELLED)
-                    )
+                # Cancel concession preorders of all expired orders and return their items to stock
+                # with one aggregated update
+                await release_order_preorders(db, expired_order_ids)
 
-                    # Update concession preorders to cancelled
-                    await db.execute(
-                        update(ConcessionPreorder)
-                        .where(ConcessionPreorder.order_id == order.id)
-                        .values(status=PreorderStatus.CANCELLED)
-                    )
-
-                    # Return concession items to stock/inventory by incrementing stock quantity
-                    from app.models.concession_item import ConcessionItem
-                    preorder_items = await db.execute(
-                        select(ConcessionPreorder)
-                        .filter(ConcessionPreorder.order_id == order.id)
-                    )
-                    preorders = preorder_items.scalars().all()
-
-                    for preorder in preorders:
-                        # Increase the stock of the concession item by the quantity that was preordered
-                        await db.execute(
-                            update(ConcessionItem)
-                            .where(ConcessionItem.id == preorder.concession_item_id)
-                            .values(stock_quantity=ConcessionItem.stock_quantity + preorder.quantity)
+                # If an order used bonus points, return them to user's bonus account
+                # Find bonus transactions related to these orders and reverse them
+                bonus_transactions_result = await db.execute(
+                    select(BonusTransaction).filter(
+                        and_(
+                            BonusTransaction.order_id.in_(expired_order_ids),
+                            BonusTransaction.transaction_type == BonusTransactionType.DEDUCTION
                         )
-
-                    # If the order used bonus points, return them to user's bonus account
-                    # Find bonus transactions related to this order and reverse them
-                    bonus_transactions_result = await db.execute(
-                        select(BonusTransaction).filter(
-                            and_(
-                                BonusTransaction.order_id == order.id,
-                                BonusTransaction.transaction_type == BonusTransactionType.DEDUCTION
-                            )
+                    )
+                )
+                bonus_transactions = bonus_transactions_result.scalars().all()
+
+                # Load all affected bonus accounts with one query
+                bonus_accounts = {}
+                if bonus_transactions:
+                    bonus_accounts_result = await db.execute(
+                        select(BonusAccount).filter(
+                            BonusAccount.id.in_({bonus_tx.bonus_account_id for bonus_tx in bonus_transactions})
                         )
                     )
-                    bonus_transactions = bonus_transactions_result.scalars().all()
-
-                    for bonus_tx in bonus_transactions:
-                        # Get the bonus account associated with this transaction
-                        bonus_account_result = await db.execute(
-                            select(BonusAccount).filter(BonusAccount.id == bonus_tx.bonus_account_id)
+                    bonus_accounts = {account.id: account for account in bonus_accounts_result.scalars().all()}
+
+                for bonus_tx in bonus_transactions:
+                    bonus_account = bonus_accounts.get(bonus_tx.bonus_account_id)
+
+                    if bonus_account:
+                        # Return the deducted amount to the user's bonus account
+                        bonus_account.balance += abs(bonus_tx.amount)
+
+                        # Create a reversal transaction record
+                        reversal_transaction = BonusTransaction(
+                            bonus_account_id=bonus_account.id,
+                            order_id=bonus_tx.order_id,  # Link to the order that is being cancelled
+                            transaction_date=current_time,  # Use Moscow time for consistency
+                            amount=abs(bonus_tx.amount),  # Positive amount for reversal
+                            transaction_type=BonusTransactionType.ACCRUAL,
                         )
-                        bonus_account = bonus_account_result.scalar_one_or_none()
-
-                        if bonus_account:
-                            # Return the deducted amount to the user's bonus account
-                            bonus_account.balance += abs(bonus_tx.amount)
-
-                            # Create a reversal transaction record
-                            reversal_transaction = BonusTransaction(
-                                bonus_account_id=bonus_account.id,
-                                order_id=order.id,  # Link to the order that is being cancelled
-                                transaction_date=current_time,  # Use Moscow time for consistency
-                                amount=abs(bonus_tx.amount),  # Positive amount for reversal
-                                transaction_type=BonusTransactionType.ACCRUAL,
-                            )
-                            db.add(reversal_transaction)
-
-                    await db.commit()
-                    logger.info(f"Order {order.id} cancelled successfully")
+                        db.add(reversal_transaction)
 
                 await db.commit()
+                logger.info(f"Cancelled {len(expired_order_ids)} expired orders")
 
             except Exception as e:
                 logger.error(f"Error in cancel_expired_orders task: {str(e)}")
@@ -1,3 +1,17 @@
-from .logging_middleware import LoggingMiddleware
+from .logging_middleware import LoggingMiddleware, start_http_logging, stop_http_logging
+from .auth_context import AuthContextMiddleware, get_request_claims
+from .metrics import metrics_registry
+from .query_counter import count_queries, assert_max_queries
+from .slow_queries import slow_query_recorder, start_slow_query_log, stop_slow_query_log
+from .loop_monitor import loop_monitor
+from .profiling import ProfilingMiddleware
+from .request_timing import MetricsMiddleware, instrument_routes, instrument_engine, measure_section
 
-__all__ = ["LoggingMiddleware"]
+__all__ = [
+    "LoggingMiddleware", "start_http_logging", "stop_http_logging",
+    "AuthContextMiddleware", "get_request_claims",
+    "count_queries", "assert_max_queries",
+    "slow_query_recorder", "start_slow_query_log", "stop_slow_query_log",
+    "loop_monitor", "ProfilingMiddleware",
+    "metrics_registry", "MetricsMiddleware", "instrument_routes", "instrument_engine", "measure_section",
+]
@@ -0,0 +1,108 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.security import decode_token
+from app.utils.request_timing import measure_section
+
+# Ключи в scope["state"] (доступны как request.state.auth_token / request.state.auth_claims)
+AUTH_TOKEN_STATE_KEY = "auth_token"
+AUTH_CLAIMS_STATE_KEY = "auth_claims"
+# Пользователь, определённый зависимостью авторизации
+PRINCIPAL_STATE_KEY = "principal"
+
+
+class VerifiedTokenCache:
+    """
+    Small LRU of recently verified bearer tokens.
+
+    A token string that passed signature verification maps to its claims until the
+    token's own "exp", so repeated requests with the same token skip HMAC and JSON parsing.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    def decode(self, token: str) -> Optional[dict]:
+        """Return verified claims of the token, or None if it is invalid or expired."""
+        entry = self._entries.get(token)
+        if entry is not None:
+            expires_at, claims = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(token)
+                return claims
+            del self._entries[token]
+
+        claims = decode_token(token)
+        if claims is None:
+            return None
+
+        # decode_token already rejected expired tokens; tokens without exp are not cached
+        expires_at = claims.get("exp")
+        if isinstance(expires_at, (int, float)):
+            self._entries[token] = (float(expires_at), claims)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return claims
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+verified_token_cache = VerifiedTokenCache(max_size=settings.VERIFIED_TOKEN_CACHE_MAX_SIZE)
+
+
+def extract_bearer_token(authorization_header: Optional[str]) -> Optional[str]:
+    """Extract the token from an "Authorization: Bearer <token>" header value."""
+    if not authorization_header or not authorization_header.startswith("Bearer "):
+        return None
+    return authorization_header[7:] or None
+
+
+def get_request_claims(connection: HTTPConnection, token: Optional[str] = None) -> Optional[dict]:
+    """
+    Get verified JWT claims of the current request.
+
+    Reads the claims stored by AuthContextMiddleware; if the middleware did not run for
+    this request (or the token differs), verifies the token and stores the result.
+    """
+    state = connection.scope.setdefault("state", {})
+    if token is None:
+        token = state.get(AUTH_TOKEN_STATE_KEY)
+        if token is None:
+            token = extract_bearer_token(connection.headers.get("Authorization"))
+
+    if token is None:
+        return None
+
+    if state.get(AUTH_TOKEN_STATE_KEY) == token and AUTH_CLAIMS_STATE_KEY in state:
+        return state[AUTH_CLAIMS_STATE_KEY]
+
+    claims = verified_token_cache.decode(token)
+    state[AUTH_TOKEN_STATE_KEY] = token
+    state[AUTH_CLAIMS_STATE_KEY] = claims
+    return claims
+
+
+class AuthContextMiddleware:
+    """
+    Pure ASGI middleware that verifies the bearer token once per request.
+
+    The token and its claims (None for an invalid token) are stored in scope["state"],
+    so logging middleware and auth dependencies share a single verification.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            with measure_section("auth"):
+                get_request_claims(HTTPConnection(scope))
+        await self.app(scope, receive, send)
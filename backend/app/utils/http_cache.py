@@ -0,0 +1,21 @@
+from typing import Optional
+
+
+def _opaque_tag(tag: str) -> str:
+    # Слабое сравнение (RFC 9110, 13.1.2): префикс W/ не учитывается
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against the current ETag of a resource.
+
+    Accepts "*", weak validators (W/"...") and comma-separated lists of tags.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = _opaque_tag(etag)
+    return any(_opaque_tag(tag) == current for tag in if_none_match.split(","))
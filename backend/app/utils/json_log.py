@@ -0,0 +1,81 @@
+import json
+import logging
+import queue
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from app.utils.metrics import metrics_registry
+
+log_records_dropped_total = metrics_registry.counter(
+    "log_records_dropped_total",
+    "Log records dropped because the queue of the background writer was full",
+    ("logger",)
+)
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Format a record whose message is a dict as one JSON line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if isinstance(record.msg, dict):
+            entry.update(record.msg)
+        else:
+            entry["message"] = record.getMessage()
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _PassthroughQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread and drops records when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Сообщение - свежий dict на каждую запись, копировать и форматировать в event loop не нужно
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Фоновый поток не успевает (или не запущен): запись теряется, но память не растёт
+            log_records_dropped_total.inc((record.name,))
+
+
+class _JsonFileListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Очередь может быть заполнена: ждём, пока поток освободит место, а не падаем на queue.Full
+        self.queue.put(self._sentinel)
+
+
+def create_queued_json_logger(name: str, max_size: int) -> "queue.Queue[logging.LogRecord]":
+    """Make logger `name` enqueue its records; returns the bounded queue for a JSON file listener."""
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=max_size)
+    queued_logger = logging.getLogger(name)
+    queued_logger.setLevel(logging.INFO)
+    queued_logger.propagate = False
+    queued_logger.addHandler(_PassthroughQueueHandler(log_queue))
+    return log_queue
+
+
+def start_json_file_listener(
+    log_queue: "queue.Queue[logging.LogRecord]",
+    filename: str,
+    max_bytes: int,
+    backup_count: int
+) -> QueueListener:
+    """Start a background thread writing queued records as JSON lines to a rotating file."""
+    file_handler = RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    file_handler.setFormatter(JsonLineFormatter())
+    listener = _JsonFileListener(log_queue, file_handler, respect_handler_level=False)
+    listener.start()
+    return listener
+
+
+def stop_json_file_listener(listener: QueueListener) -> None:
+    """Flush queued records and stop the background writer."""
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
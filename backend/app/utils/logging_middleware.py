@@ -1,116 +1,138 @@
+import logging
+import random
 import time
+from logging.handlers import QueueListener
 from typing import Optional
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-import logging
-from app.utils.security import decode_token # Убедитесь, что decode_token корректно импортирован
+
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.auth_context import get_request_claims
+from app.utils.json_log import create_queued_json_logger, start_json_file_listener, stop_json_file_listener
+
+BODY_METHODS = ("POST", "PUT", "PATCH")
+
 
 # --- Настройка логгера ---
-# Создаём логгер с именем 'http_logs'
+# Логгер 'http_logs' только кладёт записи в очередь; запись в файл с ротацией
+# выполняет QueueListener в фоновом потоке
+http_log_queue = create_queued_json_logger("http_logs", settings.HTTP_LOG_QUEUE_MAX_SIZE)
 logger = logging.getLogger("http_logs")
-logger.setLevel(logging.INFO)
-
-# Создаём обработчик, который будет записывать в файл
-file_handler = logging.FileHandler("http_requests.log") # Логи будут писаться в этот файл
-file_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(file_formatter)
 
-# Добавляем обработчик к логгеру
-logger.addHandler(file_handler)
+_listener: Optional[QueueListener] = None
 # --- Конец настройки ---
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+
+def start_http_logging() -> None:
+    """Start the background thread that writes HTTP logs to the rotating file."""
+    global _listener
+    if _listener is None:
+        _listener = start_json_file_listener(
+            http_log_queue,
+            settings.HTTP_LOG_FILE,
+            settings.HTTP_LOG_MAX_BYTES,
+            settings.HTTP_LOG_BACKUP_COUNT
+        )
+
+
+def stop_http_logging() -> None:
+    """Flush queued HTTP logs and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        stop_json_file_listener(_listener)
+        _listener = None
+
+
+def _should_log(status_code: int) -> bool:
+    # Ошибки логируются всегда; успешные запросы - с выборкой, которая уменьшается,
+    # когда фоновый поток не успевает разгружать очередь
+    if status_code >= 400:
+        return True
+
+    sample_rate = settings.HTTP_LOG_SAMPLE_RATE
+    if http_log_queue.qsize() >= settings.HTTP_LOG_LOAD_QUEUE_THRESHOLD:
+        sample_rate = min(sample_rate, settings.HTTP_LOG_LOAD_SAMPLE_RATE)
+
+    return sample_rate >= 1.0 or random.random() < sample_rate
+
+
+class LoggingMiddleware:
     """
-    Middleware to log incoming requests and outgoing responses.
+    Pure ASGI middleware to log incoming requests and outgoing responses.
     Logs include:
     - Request method and URL
-    - Request body (when available)
+    - Request body (optional, truncated, not for excluded paths)
     - Response status code
     - User login (when authenticated)
     - Processing time
+
+    The request body is copied as the application reads it, so the body is neither
+    buffered up front nor replayed. Records go through a queue to a background thread.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        # Get start time
-        start_time = time.time()
-
-        # Get request details
-        method = request.method
-        url = str(request.url)
-
-        # Attempt to extract user info from JWT token
-        user_email = "anonymous"
-        token = self._extract_token_from_request(request)
-        if token:
-            user_info = self._decode_token_and_get_user(token)
-            if user_info:
-                user_email = user_info.get('email', 'anonymous')
-
-        # Read request body if present
-        request_body = ""
-        if request.method in ['POST', 'PUT', 'PATCH']:
-            try:
-                # Read the body for logging
-                body_bytes = await request.body()
-                if body_bytes:
-                    request_body = body_bytes.decode('utf-8')
-
-                # Important: Create a new request with the same body for further processing
-                # This is necessary because request.body() can only be consumed once
-                async def receive():
-                    return {"type": "http.request", "body": body_bytes}
-
-                request._receive = receive
-            except Exception:
-                request_body = "<could not read body>"
-
-        # Process the request
-        response = await call_next(request)
-
-        # Calculate processing time
-        process_time = time.time() - start_time
-
-        # Log the request and response
-        # Теперь вызов делается как logger.info(...)
-        logger.info({
-            "event": "request_response_log",
-            "method": method,
-            "url": url,
-            "status_code": response.status_code,
-            "user": user_email,
-            "request_body": request_body,
-            "processing_time": f"{process_time:.4f}s"
-        })
-
-        return response
-
-    def _extract_token_from_request(self, request: Request) -> Optional[str]:
-        """Extract JWT token from request headers."""
-        authorization_header = request.headers.get("Authorization")
-
-        if not authorization_header:
-            return None
-
-        # Expected format: "Bearer <token>"
-        if not authorization_header.startswith("Bearer "):
-            return None
-
-        token = authorization_header[7:]  # Remove "Bearer " prefix
-        return token
-
-    def _decode_token_and_get_user(self, token: str) -> Optional[dict]:
-        """Get user information from JWT token."""
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.body_max_bytes = settings.HTTP_LOG_BODY_MAX_BYTES
+        self.body_exclude_paths = tuple(
+            path.strip() for path in settings.HTTP_LOG_BODY_EXCLUDE_PATHS.split(",") if path.strip()
+        )
+
+    def _capture_body(self, scope: Scope) -> bool:
+        return (
+            settings.HTTP_LOG_CAPTURE_BODY
+            and scope["method"] in BODY_METHODS
+            and not scope["path"].startswith(self.body_exclude_paths)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+        body = bytearray()
+        body_size = 0
+
+        async def receive_with_capture() -> Message:
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body_size += len(chunk)
+                if len(body) < self.body_max_bytes:
+                    body.extend(chunk[:self.body_max_bytes - len(body)])
+            return message
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        capture_body = self._capture_body(scope)
         try:
-            # Decode the token using the imported function
-            payload = decode_token(token)
-            if not payload:
-                return None
-
-            email = payload.get("sub")  # Subject field typically contains user identifier
-            if not email:
-                return None
-
-            return {"email": email}
-        except Exception:
-            # If token is invalid or expired, return None
-            return None
+            await self.app(scope, receive_with_capture if capture_body else receive, send_with_status)
+        finally:
+            if _should_log(status_code):
+                process_time = time.perf_counter() - start_time
+                connection = HTTPConnection(scope)
+
+                claims = get_request_claims(connection)
+                entry = {
+                    "event": "request_response_log",
+                    "method": scope["method"],
+                    "url": str(connection.url),
+                    "status_code": status_code,
+                    # Subject field typically contains user identifier
+                    "user": claims.get("sub", "anonymous") if claims else "anonymous",
+                    "processing_time": round(process_time, 4),
+                }
+                if capture_body:
+                    entry["request_body"] = body.decode("utf-8", errors="replace")
+                    if body_size > len(body):
+                        entry["request_body_truncated"] = True
+                        entry["request_body_size"] = body_size
+
+                logger.info(entry)
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+
+from app.config import settings
+from app.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+LAG_QUANTILES = (0.5, 0.95, 0.99)
+
+event_loop_lag = metrics_registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay between scheduled and actual wakeups of the event loop lag sampler",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+event_loop_lag_quantile = metrics_registry.gauge(
+    "event_loop_lag_quantile_seconds",
+    "Event loop lag quantiles over the recent sampling window",
+    ("quantile",)
+)
+event_loop_blocked_total = metrics_registry.counter(
+    "event_loop_blocked_total",
+    "Times the event loop was blocked for longer than LOOP_BLOCK_THRESHOLD_MS"
+)
+
+
+def _quantile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+class LoopLagMonitor:
+    """
+    Event loop lag sampler with a blocking-call detector.
+
+    A coroutine sleeps for a fixed interval and records how late it wakes up. A watchdog
+    thread checks the coroutine's heartbeat; if the loop has not come back for longer than
+    the block threshold, it captures the stack of the loop thread - the code that blocks it.
+    """
+
+    def __init__(self, interval: float, block_threshold: float, window: int):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.samples: Deque[float] = deque(maxlen=window)
+        # Счётчик тиков: длина заполненного окна больше не меняется и для этого не годится
+        self._ticks = 0
+        self.blocking_reports: Deque[Dict[str, Any]] = deque(maxlen=settings.LOOP_BLOCK_REPORTS_LIMIT)
+        self._heartbeat = time.perf_counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._task = self._loop.create_task(self._sample(), name="event-loop-lag-sampler")
+        self._watchdog = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog = None
+
+    async def _sample(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._heartbeat = now
+
+            lag = max(0.0, now - expected)
+            self.samples.append(lag)
+            event_loop_lag.observe((), lag)
+
+            # Квантили для /metrics пересчитываем раз в 50 замеров
+            self._ticks += 1
+            if self._ticks % 50 == 0:
+                for q, value in self.percentiles().items():
+                    event_loop_lag_quantile.set((q,), value)
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while not self._stop.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked_for = time.perf_counter() - heartbeat - self.interval
+            # Один отчёт на эпизод блокировки: пока heartbeat не обновился, повторно не пишем
+            if blocked_for < self.block_threshold or heartbeat == reported_heartbeat:
+                continue
+            reported_heartbeat = heartbeat
+            self._report_blocking(blocked_for)
+
+    def _report_blocking(self, blocked_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame) if frame is not None else []
+
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        report = {
+            "detected_at": datetime.now().isoformat(timespec="milliseconds"),
+            "blocked_for_ms": round(blocked_for * 1000, 1),
+            "task": task.get_name() if task is not None else None,
+            "stack": [line.rstrip() for line in stack],
+        }
+        self.blocking_reports.append(report)
+        event_loop_blocked_total.inc()
+        logger.warning(
+            "Event loop blocked for at least %.0f ms in task %s:\n%s",
+            blocked_for * 1000, report["task"], "".join(stack)
+        )
+
+    def percentiles(self) -> Dict[str, float]:
+        values = sorted(self.samples)
+        result = {str(q): _quantile(values, q) for q in LAG_QUANTILES}
+        result["max"] = values[-1] if values else 0.0
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Lag percentiles in milliseconds and the recent blocking reports, newest first."""
+        return {
+            "interval_ms": self.interval * 1000,
+            "block_threshold_ms": self.block_threshold * 1000,
+            "samples": len(self.samples),
+            "lag_ms": {name: round(value * 1000, 2) for name, value in self.percentiles().items()},
+            "blocking_reports": list(reversed(self.blocking_reports)),
+        }
+
+
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_MS / 1000,
+    block_threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000,
+    window=settings.LOOP_MONITOR_WINDOW
+)
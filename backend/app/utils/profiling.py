@@ -0,0 +1,254 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.models.enums import UserRoles, UserStatus
+from app.services.principal_cache import resolve_principal
+from app.utils.auth_context import get_request_claims
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+# Лист стека, когда задача запроса ждёт (ввод-вывод, пул потоков или очередь event loop)
+AWAIT_FRAME = "[await]"
+
+
+def _short_path(filename: str) -> str:
+    # Путь относительно самого длинного подходящего корня sys.path: asyncio/events.py, app/routers/...
+    for root in _path_roots():
+        if filename.startswith(root):
+            return filename[len(root):]
+    return filename
+
+
+@functools.lru_cache(maxsize=1)
+def _path_roots() -> List[str]:
+    roots = {os.path.abspath(path or os.curdir) + os.sep for path in sys.path}
+    return sorted(roots, key=len, reverse=True)
+
+
+@functools.lru_cache(maxsize=4096)
+def _code_name(code) -> str:
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({_short_path(code.co_filename)})"
+
+
+def _frame_name(frame) -> str:
+    return _code_name(frame.f_code)
+
+
+class RequestProfiler:
+    """
+    Statistical wall-clock profiler of one request task.
+
+    A background thread samples the event loop thread every PROFILING_SAMPLE_INTERVAL_MS.
+    While the request task runs, its stack is taken from the loop thread; while it is
+    suspended, the stack of its awaiting coroutines is recorded with an "[await]" leaf.
+    Samples of other tasks sharing the loop are ignored. Stacks are aggregated in the
+    folded format ("outer;inner count") accepted by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._loop_thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        # Поток может быть в середине замера: ждём его в пуле потоков, не блокируя event loop
+        await asyncio.to_thread(self._thread.join)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                # Стек корутины может измениться во время обхода - такой замер пропускаем
+                continue
+
+    def _sample(self) -> None:
+        if asyncio.current_task(self._loop) is self._task:
+            stack = [_frame_name(frame) for frame in self._running_frames()]
+        else:
+            stack = [_frame_name(frame) for frame in self._suspended_frames()]
+            stack.append(AWAIT_FRAME)
+
+        if stack:
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def _running_frames(self) -> list:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        # Отбрасываем кадры event loop до шага задачи (Handle._run вызывает Task.__step)
+        for index in range(len(frames) - 1, -1, -1):
+            code = frames[index].f_code
+            if code.co_name in ("_run", "__step") and code.co_filename.endswith(("events.py", "tasks.py")):
+                return frames[index + 1:]
+        return frames
+
+    def _suspended_frames(self) -> list:
+        # Цепочка cr_await от корутины задачи до самой вложенной ожидающей корутины
+        frames = []
+        coro = self._task.get_coro()
+        while coro is not None:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is None:
+                break
+            frames.append(frame)
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        return frames
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _profiling_requested(scope: Scope) -> bool:
+    connection = HTTPConnection(scope)
+    flag = connection.headers.get(PROFILE_HEADER) or connection.query_params.get(PROFILE_QUERY_PARAM)
+    return flag in ("1", "true")
+
+
+def _is_super_admin(principal: Any) -> bool:
+    role = getattr(principal, "role", None)
+    return role is not None and role.name == UserRoles.super_admin
+
+
+def _save_profile(profile_id: str, folded: str, meta: Dict[str, Any]) -> None:
+    os.makedirs(settings.PROFILES_DIR, exist_ok=True)
+    with open(os.path.join(settings.PROFILES_DIR, f"{profile_id}.folded"), "w", encoding="utf-8") as f:
+        f.write(folded)
+    with open(os.path.join(settings.PROFILES_DIR, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    # Храним только последние PROFILES_MAX_FILES профилей (идентификаторы сортируются по времени)
+    profile_ids = sorted(name[:-5] for name in os.listdir(settings.PROFILES_DIR) if name.endswith(".json"))
+    for old_id in profile_ids[:-settings.PROFILES_MAX_FILES]:
+        for extension in (".folded", ".json"):
+            try:
+                os.remove(os.path.join(settings.PROFILES_DIR, old_id + extension))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Metadata of stored profiles, newest first."""
+    if not os.path.isdir(settings.PROFILES_DIR):
+        return []
+
+    profiles = []
+    for name in sorted(os.listdir(settings.PROFILES_DIR), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(settings.PROFILES_DIR, name), encoding="utf-8") as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def get_profile_path(profile_id: str) -> Optional[str]:
+    """Path of the folded stacks file of a profile, or None for an unknown or malformed id."""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILES_DIR, f"{profile_id}.folded")
+    return path if os.path.isfile(path) else None
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that profiles requests flagged with "X-Profile: 1" (or "_profile=1").
+
+    The flag is honored only for super admins: the role is checked before the profiler
+    starts (principal cache, or a short lookup on a miss), and requests of other users
+    pass straight through. The profile id is returned in X-Profile-Id.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        principal = await self._profiling_principal(scope)
+        if principal is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = RequestProfiler(settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await profiler.stop()
+            meta = {
+                "id": profile_id,
+                "created_at": datetime.now().isoformat(timespec="milliseconds"),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query_string": scope.get("query_string", b"").decode("latin-1"),
+                "user": principal.email,
+                "status_code": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "samples": profiler.samples,
+                "sample_interval_ms": settings.PROFILING_SAMPLE_INTERVAL_MS,
+            }
+            try:
+                await asyncio.to_thread(_save_profile, profile_id, profiler.folded(), meta)
+            except OSError:
+                logger.exception("Failed to save profile %s", profile_id)
+
+    @staticmethod
+    async def _profiling_principal(scope: Scope) -> Optional[Any]:
+        """Active super admin who flagged the request for profiling, or None."""
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED or not _profiling_requested(scope):
+            return None
+
+        claims = get_request_claims(HTTPConnection(scope))
+        subject = claims.get("sub") if claims else None
+        if subject is None:
+            return None
+
+        principal = await resolve_principal(subject)
+        if principal is None or principal.status != UserStatus.ACTIVE or not _is_super_admin(principal):
+            return None
+        return principal
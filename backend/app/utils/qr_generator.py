@@ -1,22 +1,32 @@
 import qrcode
+import qrcode.image.svg
 from io import BytesIO
 import base64
+import hashlib
 from typing import Optional
 
 from app.config import settings
 
 
-def generate_qr_code(data: str, size: Optional[int] = None, border: Optional[int] = None) -> str:
+QR_IMAGE_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+def render_qr_image(data: str, image_format: str = "png", size: Optional[int] = None,
+                    border: Optional[int] = None) -> bytes:
     """
-    Generate a QR code from data and return as base64 encoded string.
+    Render a QR code image. CPU-bound: call it from a worker thread, not the event loop.
 
     Args:
         data: The data to encode in the QR code
+        image_format: "png" or "svg"
         size: QR code box size (default from settings)
         border: QR code border size (default from settings)
 
     Returns:
-        Base64 encoded PNG image string
+        Encoded image bytes
     """
     qr_size = size or settings.QR_CODE_SIZE
     qr_border = border or settings.QR_CODE_BORDER
@@ -26,20 +36,61 @@ def generate_qr_code(data: str, size: Optional[int] = None, border: Optional[int
         error_correction=qrcode.constants.ERROR_CORRECT_L,
         box_size=qr_size,
         border=qr_border,
+        image_factory=qrcode.image.svg.SvgPathImage if image_format == "svg" else None,
     )
     qr.add_data(data)
     qr.make(fit=True)
 
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    # Convert to base64
     buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    img_str = base64.b64encode(buffer.getvalue()).decode()
+    if image_format == "svg":
+        qr.make_image().save(buffer)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
 
+def generate_qr_code(data: str, size: Optional[int] = None, border: Optional[int] = None) -> str:
+    """
+    Generate a QR code from data and return as base64 encoded string.
+
+    Args:
+        data: The data to encode in the QR code
+        size: QR code box size (default from settings)
+        border: QR code border size (default from settings)
+
+    Returns:
+        Base64 encoded PNG image string
+    """
+    img_str = base64.b64encode(render_qr_image(data, "png", size, border)).decode()
     return f"data:image/png;base64,{img_str}"
 
 
+def qr_payload_hash(payload: str) -> str:
+    """Content hash of a QR payload - key of the image cache and version of image URLs."""
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def order_qr_image_url(order_id: int, payload: Optional[str], image_format: str = "png") -> Optional[str]:
+    """
+    URL of the rendered QR image of an order.
+
+    The payload hash in the query string makes the URL content-addressed, so clients
+    may cache the image for as long as they like.
+    """
+    if not payload:
+        return None
+    return f"/api/v1/bookings/{order_id}/qr.{image_format}?v={qr_payload_hash(payload)[:16]}"
+
+
+def order_qr_payload(order_id: int) -> str:
+    """
+    Unsigned order payload, used for orders that have no signed QR token.
+
+    Format: ORDER:{order_id}
+    """
+    return f"ORDER:{order_id}"
+
+
 def generate_ticket_qr(ticket_id: int, session_id: int, seat_id: int) -> str:
     """
     Generate a QR code for a ticket.
@@ -66,8 +117,7 @@ def generate_order_qr(order_id: int) -> str:
 
     Format: ORDER:{order_id}
     """
-    qr_data = f"ORDER:{order_id}"
-    return generate_qr_code(qr_data)
+    return generate_qr_code(order_qr_payload(order_id))
 
 
 def parse_qr_data(qr_data: str) -> Optional[dict]:
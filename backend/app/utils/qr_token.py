@@ -0,0 +1,136 @@
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+import pytz
+
+from app.config import settings
+
+QR_TOKEN_PREFIX = "CQ1"
+# Усечённая подпись HMAC-SHA256: 128 бит достаточно и QR-код остаётся небольшим
+SIGNATURE_BYTES = 16
+
+
+class QrTokenClaims:
+    """Verified contents of a signed order QR token."""
+
+    __slots__ = ("order_id", "seats", "not_before", "not_after")
+
+    def __init__(self, order_id: int, seats: List[Tuple[int, int]], not_before: datetime, not_after: datetime):
+        self.order_id = order_id
+        self.seats = seats  # [(session_id, seat_id), ...]
+        self.not_before = not_before
+        self.not_after = not_after
+
+    @property
+    def session_ids(self) -> List[int]:
+        return sorted({session_id for session_id, _ in self.seats})
+
+    def seat_ids_for(self, session_id: int) -> List[int]:
+        return [seat_id for seat_session_id, seat_id in self.seats if seat_session_id == session_id]
+
+    def window_status(self, now: Optional[datetime] = None) -> str:
+        """"valid", "not_yet_valid" or "expired" for the given (naive Moscow) time."""
+        now = now or _moscow_now()
+        if now < self.not_before:
+            return "not_yet_valid"
+        if now > self.not_after:
+            return "expired"
+        return "valid"
+
+
+def _moscow_now() -> datetime:
+    return datetime.now(pytz.timezone('Europe/Moscow')).replace(tzinfo=None)
+
+
+def _to_timestamp(value: datetime) -> int:
+    # Время в БД хранится наивным московским; в токене это те же значения в секундах
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _from_timestamp(value: int) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _signing_key() -> bytes:
+    if settings.QR_TOKEN_SECRET:
+        return settings.QR_TOKEN_SECRET.encode("utf-8")
+    # Отдельный ключ, производный от SECRET_KEY, чтобы подпись QR не совпадала с подписью JWT
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), b"qr-token", hashlib.sha256).digest()
+
+
+def _sign(body: str) -> str:
+    return _b64encode(hmac.new(_signing_key(), body.encode("utf-8"), hashlib.sha256).digest()[:SIGNATURE_BYTES])
+
+
+def issue_order_qr_token(order_id: int, seats: Iterable[Tuple[int, int, datetime, datetime]]) -> str:
+    """
+    Create the signed QR payload of an order.
+
+    Args:
+        order_id: Order id
+        seats: (session_id, seat_id, session_start, session_end) of every ticket in the order
+
+    Returns:
+        Token "CQ1.<payload>.<signature>" with the order id, (session_id, seat_id) pairs and
+        the entry window from QR_TOKEN_ENTRY_OPENS_MINUTES before the first session to the
+        end of the last one
+    """
+    seats = list(seats)
+    not_before = min(start for _, _, start, _ in seats) - timedelta(minutes=settings.QR_TOKEN_ENTRY_OPENS_MINUTES)
+    not_after = max(end for _, _, _, end in seats)
+    # Места сгруппированы по сеансам: [[session_id, seat_id, seat_id, ...], ...]
+    by_session = {}
+    for session_id, seat_id, _, _ in seats:
+        by_session.setdefault(session_id, []).append(seat_id)
+    payload = {
+        "o": order_id,
+        "t": [[session_id, *seat_ids] for session_id, seat_ids in by_session.items()],
+        "nb": _to_timestamp(not_before),
+        "na": _to_timestamp(not_after),
+    }
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return f"{QR_TOKEN_PREFIX}.{body}.{_sign(body)}"
+
+
+def is_qr_token(qr_data: str) -> bool:
+    """Whether the scanned string looks like a signed token (as opposed to a legacy payload)."""
+    return qr_data.startswith(QR_TOKEN_PREFIX + ".")
+
+
+def verify_qr_token(qr_data: str) -> Optional[QrTokenClaims]:
+    """
+    Check the signature of a QR token without touching the database.
+
+    Returns:
+        Token claims, or None if the token is malformed or its signature does not match.
+        The validity window is not checked here - see QrTokenClaims.window_status.
+    """
+    try:
+        prefix, body, signature = qr_data.split(".")
+    except ValueError:
+        return None
+    if prefix != QR_TOKEN_PREFIX or not hmac.compare_digest(signature.encode("utf-8"), _sign(body).encode("ascii")):
+        return None
+
+    try:
+        payload = json.loads(_b64decode(body))
+        return QrTokenClaims(
+            order_id=int(payload["o"]),
+            seats=[(int(group[0]), int(seat_id)) for group in payload["t"] for seat_id in group[1:]],
+            not_before=_from_timestamp(payload["nb"]),
+            not_after=_from_timestamp(payload["na"]),
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Tuple
+
+
+class QueryCounter:
+    """Statements executed within a scope: total count, time and repeats per statement text."""
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # Текст запроса (с плейсхолдерами параметров) -> число выполнений
+        self.statements: Dict[str, int] = {}
+
+    def record(self, statement: str, duration: float) -> int:
+        """Record one statement and return how many times this statement text has run so far."""
+        self.count += 1
+        self.duration += duration
+        repeats = self.statements.get(statement, 0) + 1
+        self.statements[statement] = repeats
+        return repeats
+
+    def most_repeated(self, limit: int = 5) -> List[Tuple[str, int]]:
+        return sorted(self.statements.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+# Счётчики, открытые через count_queries() в текущем контексте (поддерживается вложенность)
+_active_counters: ContextVar[Tuple[QueryCounter, ...]] = ContextVar("active_query_counters", default=())
+
+
+def record_scoped_query(statement: str, duration: float) -> None:
+    """Feed an executed statement to every counter opened in the current context."""
+    for counter in _active_counters.get():
+        counter.record(statement, duration)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """
+    Count SQL statements executed by the current task inside the block.
+
+    Only engines instrumented with request_timing.instrument_engine are counted
+    (app.main instruments the application engine).
+    """
+    counter = QueryCounter()
+    token = _active_counters.set(_active_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _active_counters.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryCounter]:
+    """
+    Fail if the block executes more than `limit` SQL statements.
+
+    Intended for pinning query budgets of hot endpoints in tests:
+
+        with assert_max_queries(3):
+            await get_my_bookings(current_user=user, db=db)
+    """
+    with count_queries() as counter:
+        yield counter
+
+    if counter.count > limit:
+        repeated = "\n".join(
+            f"  {repeats}x {statement[:200]}" for statement, repeats in counter.most_repeated()
+        )
+        raise AssertionError(
+            f"Expected at most {limit} SQL queries, got {counter.count}. Most repeated:\n{repeated}"
+        )
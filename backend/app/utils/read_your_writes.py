@@ -0,0 +1,58 @@
+import time
+from typing import Optional
+
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.replica_router import READ_YOUR_WRITES_COOKIE, replica_router
+from app.utils.auth_context import get_request_claims
+
+# Методы, которые не меняют данные и не продлевают окно read-your-writes
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def read_primary_until(connection: HTTPConnection) -> Optional[float]:
+    """Unix time until which the client's replica-eligible reads must go to the primary (cookie)."""
+    value = connection.cookies.get(READ_YOUR_WRITES_COOKIE)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware that opens the read-your-writes window of a successful write.
+
+    The window is recorded when the response starts, i.e. before the client can send its
+    next request (yield-dependency teardown runs only after the response is sent). It is
+    kept in two places: the router of this worker (by token subject) and a cookie with the
+    window end, so a follow-up read served by another uvicorn worker also goes to the primary.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or not replica_router.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_window(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                claims = get_request_claims(HTTPConnection(scope))
+                replica_router.record_write(claims.get("sub") if claims else None)
+
+                window = replica_router.read_your_writes
+                cookie = (
+                    f"{READ_YOUR_WRITES_COOKIE}={time.time() + window:.3f}; "
+                    f"Max-Age={int(window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", cookie.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_window)
@@ -0,0 +1,249 @@
+import asyncio
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.routing import request_response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.metrics import metrics_registry
+from app.utils.query_counter import QueryCounter, record_scoped_query
+from app.utils.slow_queries import slow_query_recorder
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = "unmatched"
+
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route")
+)
+http_requests_total = metrics_registry.counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ("method", "route", "status")
+)
+http_requests_in_flight = metrics_registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled by route template",
+    ("method", "route")
+)
+http_request_db_queries = metrics_registry.histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request by route template",
+    ("method", "route"),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+db_repeated_statements_total = metrics_registry.counter(
+    "db_repeated_statements_total",
+    "Requests in which one statement repeated more than DB_REPEATED_QUERY_THRESHOLD times (N+1 suspects)",
+    ("method", "route")
+)
+
+
+class RequestTimings:
+    """Timing breakdown of one HTTP request, shared through a context variable."""
+
+    __slots__ = ("started", "method", "route", "sections", "endpoint_finished", "queries")
+
+    def __init__(self, method: str):
+        self.started = time.perf_counter()
+        self.method = method
+        # Шаблон пути маршрута (например /api/v1/sessions/{session_id}/seats)
+        self.route: Optional[str] = None
+        # Накопленное время по разделам (auth, db, ...) в секундах
+        self.sections: Dict[str, float] = {}
+        # Момент возврата из функции эндпоинта - начало сериализации ответа
+        self.endpoint_finished: Optional[float] = None
+        # SQL-запросы запроса - для счётчика и поиска N+1
+        self.queries = QueryCounter()
+
+    def add(self, section: str, seconds: float) -> None:
+        self.sections[section] = self.sections.get(section, 0.0) + seconds
+
+
+current_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_request_timings", default=None)
+
+
+def record_section(section: str, seconds: float) -> None:
+    """Add time spent in a section to the current request, if there is one."""
+    timings = current_request_timings.get()
+    if timings is not None:
+        timings.add(section, seconds)
+
+
+@contextmanager
+def measure_section(section: str) -> Iterator[None]:
+    """Measure the enclosed block as part of a section of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_section(section, time.perf_counter() - started)
+
+
+def _server_timing_header(timings: RequestTimings, response_started: float) -> bytes:
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.sections.items()]
+    if timings.endpoint_finished is not None:
+        entries.append(f"serialize;dur={(response_started - timings.endpoint_finished) * 1000:.2f}")
+    entries.append(f"total;dur={(response_started - timings.started) * 1000:.2f}")
+    return ", ".join(entries).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that records per-route latency histograms and status counts
+    and adds a Server-Timing header with the auth / db / serialize breakdown
+    (plus X-DB-Query-Count / X-DB-Time-Ms debug headers when enabled).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(scope["method"])
+        token = current_request_timings.set(timings)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                if settings.SERVER_TIMING_ENABLED:
+                    headers.append((b"server-timing", _server_timing_header(timings, time.perf_counter())))
+                if settings.DB_QUERY_DEBUG_HEADERS:
+                    headers.append((b"x-db-query-count", str(timings.queries.count).encode("latin-1")))
+                    headers.append((b"x-db-time-ms", f"{timings.queries.duration * 1000:.2f}".encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_timings.reset(token)
+            labels = (scope["method"], timings.route or UNMATCHED_ROUTE)
+            http_request_duration.observe(labels, time.perf_counter() - timings.started)
+            http_requests_total.inc(labels + (str(status_code),))
+            http_request_db_queries.observe(labels, timings.queries.count)
+
+
+class _RouteMetricsApp:
+    """ASGI wrapper of a single route: knows its path template and tracks in-flight requests."""
+
+    def __init__(self, app: ASGIApp, route_path: str):
+        self.app = app
+        self.route_path = route_path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        timings = current_request_timings.get()
+        if timings is not None:
+            timings.route = self.route_path
+
+        labels = (scope["method"], self.route_path)
+        http_requests_in_flight.inc(labels)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            http_requests_in_flight.dec(labels)
+
+
+def _mark_endpoint_finished() -> None:
+    timings = current_request_timings.get()
+    if timings is not None:
+        timings.endpoint_finished = time.perf_counter()
+
+
+def _timed_endpoint(call):
+    # FastAPI решает, вызывать ли эндпоинт в пуле потоков, по iscoroutinefunction,
+    # поэтому обёртка сохраняет асинхронность исходной функции
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_endpoint(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _mark_endpoint_finished()
+        return async_endpoint
+
+    @functools.wraps(call)
+    def sync_endpoint(*args, **kwargs):
+        try:
+            return call(*args, **kwargs)
+        finally:
+            _mark_endpoint_finished()
+    return sync_endpoint
+
+
+def instrument_routes(app: FastAPI) -> None:
+    """Attach path templates and endpoint timing to every API route of the app."""
+    for route in app.router.routes:
+        if not isinstance(route, APIRoute) or isinstance(route.app, _RouteMetricsApp):
+            continue
+        route.dependant.call = _timed_endpoint(route.dependant.call)
+        route.app = _RouteMetricsApp(request_response(route.get_route_handler()), route.path)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Record SQL statements of the engine: time in the "db" section and query counts of the
+    current request, plus slow statements for the slow-query log.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("request_timing_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["request_timing_query_start"].pop()
+        duration = time.perf_counter() - started
+        _record_query(statement, duration)
+
+        timings = current_request_timings.get()
+        slow_query_recorder.observe(
+            statement, parameters, executemany, duration,
+            timings.method if timings else None,
+            timings.route if timings else None
+        )
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        # after_cursor_execute не вызывается для упавшего запроса - снимаем его отметку
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("request_timing_query_start"):
+            started = conn.info["request_timing_query_start"].pop()
+            _record_query(exception_context.statement or "", time.perf_counter() - started)
+
+
+def _record_query(statement: str, duration: float) -> None:
+    record_scoped_query(statement, duration)
+
+    timings = current_request_timings.get()
+    if timings is None:
+        return
+
+    timings.add("db", duration)
+    repeats = timings.queries.record(statement, duration)
+    # Предупреждаем один раз - в момент, когда запрос превысил порог повторов
+    if repeats == settings.DB_REPEATED_QUERY_THRESHOLD + 1:
+        route = timings.route or UNMATCHED_ROUTE
+        db_repeated_statements_total.inc((timings.method, route))
+        logger.warning(
+            "Possible N+1: statement repeated more than %d times in %s %s: %s",
+            settings.DB_REPEATED_QUERY_THRESHOLD, timings.method, route, " ".join(statement.split())[:300]
+        )
+
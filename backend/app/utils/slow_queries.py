@@ -0,0 +1,171 @@
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import QueueListener
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.utils.json_log import create_queued_json_logger, start_json_file_listener, stop_json_file_listener
+from app.utils.metrics import metrics_registry
+
+# EXPLAIN без ANALYZE безопасен и для изменяющих запросов - они не выполняются
+EXPLAINABLE_PREFIXES = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+MAX_STATEMENT_LENGTH = 4000
+
+db_slow_queries_total = metrics_registry.counter(
+    "db_slow_queries_total",
+    "SQL statements slower than SLOW_QUERY_THRESHOLD_MS by route template",
+    ("method", "route")
+)
+
+# --- Настройка логгера ---
+slow_query_log_queue = create_queued_json_logger("slow_queries", settings.SLOW_QUERY_LOG_QUEUE_MAX_SIZE)
+logger = logging.getLogger("slow_queries")
+
+_listener: Optional[QueueListener] = None
+# --- Конец настройки ---
+
+
+def start_slow_query_log() -> None:
+    """Start the background thread that writes slow queries to the rotating file."""
+    global _listener
+    if _listener is None:
+        _listener = start_json_file_listener(
+            slow_query_log_queue,
+            settings.SLOW_QUERY_LOG_FILE,
+            settings.SLOW_QUERY_LOG_MAX_BYTES,
+            settings.SLOW_QUERY_LOG_BACKUP_COUNT
+        )
+
+
+def stop_slow_query_log() -> None:
+    """Flush queued slow-query records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        stop_json_file_listener(_listener)
+        _listener = None
+
+
+def _explain_engine() -> AsyncEngine:
+    # EXPLAIN не занимает соединения пулов, обслуживающих запросы: реплика, иначе batch-пул.
+    # Импорт внутри функции - app.database импортирует модули app.utils
+    from app.database import batch_engine, replica_engine
+    return replica_engine if replica_engine is not None else batch_engine
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> Any:
+    """Describe bound parameters by type only - values may contain personal data."""
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return {"rows": len(parameters), "row": parameter_shape(parameters[0], False)}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryRecorder:
+    """
+    Records SQL statements slower than SLOW_QUERY_THRESHOLD_MS.
+
+    Each slow statement is kept in memory for the diagnostics endpoint and written as a JSON
+    line to a rotating file. For a sample of them an EXPLAIN (ANALYZE off) plan is captured
+    in the background on a connection of the replica (or the batch pool), at most once per
+    statement text per interval.
+    """
+
+    def __init__(self):
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=settings.SLOW_QUERY_RECENT_LIMIT)
+        # Текст запроса -> время последнего EXPLAIN (monotonic)
+        self._explained_at: Dict[str, float] = {}
+        self._explain_tasks: Set[asyncio.Task] = set()
+
+    def observe(
+        self,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        duration: float,
+        method: Optional[str],
+        route: Optional[str]
+    ) -> None:
+        if not settings.SLOW_QUERY_LOG_ENABLED or duration * 1000 < settings.SLOW_QUERY_THRESHOLD_MS:
+            return
+        # Собственные EXPLAIN не записываем
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+
+        entry = {
+            "event": "slow_query",
+            "recorded_at": datetime.now().isoformat(timespec="milliseconds"),
+            "duration_ms": round(duration * 1000, 2),
+            "statement": " ".join(statement.split())[:MAX_STATEMENT_LENGTH],
+            "parameters": parameter_shape(parameters, executemany),
+            "executemany": executemany,
+            "method": method,
+            "route": route,
+            "plan": None,
+        }
+        self.recent.append(entry)
+        db_slow_queries_total.inc((method or "", route or ""))
+
+        if self._should_explain(statement, executemany):
+            self._schedule_explain(entry, statement, parameters)
+        else:
+            logger.info(entry)
+
+    def _should_explain(self, statement: str, executemany: bool) -> bool:
+        if not settings.SLOW_QUERY_EXPLAIN_ENABLED or executemany:
+            return False
+        if not statement.lstrip()[:10].upper().startswith(EXPLAINABLE_PREFIXES):
+            return False
+        if len(self._explain_tasks) >= settings.SLOW_QUERY_EXPLAIN_MAX_PENDING:
+            return False
+        if random.random() >= settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            return False
+
+        now = time.monotonic()
+        explained_at = self._explained_at.get(statement)
+        if explained_at is not None and now - explained_at < settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS:
+            return False
+
+        if len(self._explained_at) >= settings.SLOW_QUERY_RECENT_LIMIT * 10:
+            self._explained_at.clear()
+        self._explained_at[statement] = now
+        return True
+
+    def _schedule_explain(self, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.info(entry)
+            return
+
+        # Чистый контекст: EXPLAIN не должен попасть в счётчики запросов текущего HTTP-запроса.
+        # Задача копирует контекст, в котором создана (аргумент context= есть только с Python 3.11)
+        task = contextvars.Context().run(loop.create_task, self._explain(entry, statement, parameters))
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def _explain(self, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+        try:
+            async with _explain_engine().connect() as conn:
+                result = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE off) {statement}", parameters)
+                entry["plan"] = "\n".join(row[0] for row in result.all())
+        except Exception as e:
+            entry["plan_error"] = f"{type(e).__name__}: {e}"
+        finally:
+            logger.info(entry)
+
+    def get_recent(self, limit: int) -> List[Dict[str, Any]]:
+        """Most recent slow queries, newest first."""
+        return list(reversed(self.recent))[:limit]
+
+
+slow_query_recorder = SlowQueryRecorder()
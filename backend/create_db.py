@@ -6,7 +6,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from sqlalchemy import text
-from app.database import engine
+from app.database import batch_engine as engine
 from app.models import Base
 
 # Import all models to ensure they're registered with Base
@@ -10,7 +10,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import AsyncSessionLocal
+from app.database import BatchSessionLocal as AsyncSessionLocal
 from app.models.cinema import Cinema
 from app.models.film import Film
 from app.models.distributor import Distributor
@@ -11,7 +11,8 @@ from datetime import datetime, timedelta, date, time
 import random
 from decimal import Decimal
 
-from app.database import AsyncSessionLocal, engine
+# Пул batch: без короткого statement_timeout пула critical для массовых вставок
+from app.database import BatchSessionLocal
 from app.models import Base
 from app.models.role import Role
 from app.models.cinema import Cinema
@@ -2006,7 +2007,7 @@ async def seed_all():
     print("CINEMA MANAGEMENT SYSTEM - DATABASE SEED")
     print("=" * 60)
 
-    async with AsyncSessionLocal() as db:
+    async with BatchSessionLocal() as db:
         try:
             # Optional: Clear existing data (commented out for safety)
             await clear_database(db)
@@ -5,6 +5,8 @@ const instance = axios.create({
   headers: {
     'Content-Type': 'application/json',
   },
+  // Cookie read_primary_until: чтения сразу после записи идут в основную БД, а не в реплику
+  withCredentials: true,
 });
 
 // Request interceptor - добавляем токен к каждому запросу
@@ -23,6 +23,15 @@ export const bookingsAPI = {
     return response.data;
   },
 
+  // Картинка QR-кода заказа требует авторизации, поэтому загружается через axios (с токеном),
+  // а не напрямую тегом <img>. qr_code_url приходит с полным путём API.
+  getOrderQrImage: async (qrCodeUrl) => {
+    const response = await axios.get(qrCodeUrl.replace(/^\/api\/v1/, ''), {
+      responseType: 'blob',
+    });
+    return response.data;
+  },
+
 
   cancelPendingOrder: async (id) => {
     const response = await axios.post(`/bookings/${id}/cancel`);
@@ -289,6 +289,7 @@ const MyOrders = () => {
                     tickets: order.tickets || [],
                     concession_preorders: order.concession_preorders || [],
                     qr_code: order.qr_code || null,
+                    qr_code_url: order.qr_code_url || null,
                 });
             }
         } finally {
@@ -1363,6 +1364,40 @@ const OrderDetailsModal = ({
     returningLoading,
     returningOrder,
 }) => {
+    const [qrImageSrc, setQrImageSrc] = useState(null);
+    const [qrImageError, setQrImageError] = useState(false);
+    const qrCodeUrl = orderDetails?.qr_code_url;
+    const showQrCode = Boolean(qrCodeUrl) && order?.status === "paid";
+
+    // Загружаем картинку QR-кода с токеном и показываем её через object URL
+    useEffect(() => {
+        if (!showQrCode) {
+            setQrImageSrc(null);
+            return undefined;
+        }
+
+        let objectUrl = null;
+        let cancelled = false;
+        setQrImageSrc(null);
+        setQrImageError(false);
+        bookingsAPI
+            .getOrderQrImage(qrCodeUrl)
+            .then((blob) => {
+                if (cancelled) return;
+                objectUrl = URL.createObjectURL(blob);
+                setQrImageSrc(objectUrl);
+            })
+            .catch((err) => {
+                console.error("Failed to load order QR code:", err);
+                if (!cancelled) setQrImageError(true);
+            });
+
+        return () => {
+            cancelled = true;
+            if (objectUrl) URL.revokeObjectURL(objectUrl);
+        };
+    }, [qrCodeUrl, showQrCode]);
+
     const formatDate = (dateString) => {
         try {
             return format(parseISO(dateString), "d MMMM yyyy, HH:mm", {
@@ -1845,7 +1880,7 @@ const OrderDetailsModal = ({
                                 )}
 
                             {/* QR-код - показываем только если заказ оплачен */}
-                            {orderDetails && orderDetails.qr_code && order.status === "paid" && (
+                            {showQrCode && (
                                 <Grid
                                     item
                                     xs={12}
@@ -1864,19 +1899,40 @@ const OrderDetailsModal = ({
                                         >
                                             QR-код заказа
                                         </Typography>
-                                        <Box
-                                            component="img"
-                                            src={orderDetails.qr_code}
-                                            alt="QR Code"
-                                            sx={{
-                                                width: 200,
-                                                height: 200,
-                                                display: "block",
-                                                mx: "auto",
-                                                border: "1px solid #e0e0e0",
-                                                borderRadius: 1,
-                                            }}
-                                        />
+                                        {qrImageSrc ? (
+                                            <Box
+                                                component="img"
+                                                src={qrImageSrc}
+                                                alt="QR Code"
+                                                sx={{
+                                                    width: 200,
+                                                    height: 200,
+                                                    display: "block",
+                                                    mx: "auto",
+                                                    border: "1px solid #e0e0e0",
+                                                    borderRadius: 1,
+                                                }}
+                                            />
+                                        ) : (
+                                            <Box
+                                                sx={{
+                                                    width: 200,
+                                                    height: 200,
+                                                    display: "flex",
+                                                    alignItems: "center",
+                                                    justifyContent: "center",
+                                                    mx: "auto",
+                                                }}
+                                            >
+                                                {qrImageError ? (
+                                                    <Typography variant="body2" sx={{ color: "#666" }}>
+                                                        Не удалось загрузить QR-код
+                                                    </Typography>
+                                                ) : (
+                                                    <CircularProgress size={32} />
+                                                )}
+                                            </Box>
+                                        )}
                                         <Typography
                                             variant="body2"
                                             sx={{ mt: 1, color: "#666", wordBreak: "break-all", fontFamily: "monospace" }}
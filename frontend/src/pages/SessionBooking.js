@@ -204,7 +204,7 @@ const SessionBooking = () => {
                 });
                 return;
             }
-            if (current >= item.stock_quantity) {
+            if (item.stock_level === "OUT_OF_STOCK") {
                 setSnackbar({
                     open: true,
                     message: "Недостаточно товара на складе",
@@ -625,7 +625,7 @@ const SessionBooking = () => {
                             spacing={2}
                         >
                             {filteredConcessions.map((item) => {
-                                const isOutOfStock = item.stock_quantity === 0;
+                                const isOutOfStock = item.stock_level === "OUT_OF_STOCK";
                                 return (
                                     <Grid
                                         item
@@ -754,8 +754,9 @@ const SessionBooking = () => {
                                                     variant="caption"
                                                     color="text.secondary"
                                                 >
-                                                    Осталось:{" "}
-                                                    {item.stock_quantity}
+                                                    {item.stock_level === "LOW_STOCK"
+                                                        ? "Осталось мало"
+                                                        : "В наличии"}
                                                 </Typography>
                                                 <Box
                                                     sx={{